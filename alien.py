@@ -1,17 +1,17 @@
-import pygame
-from pygame.sprite import Sprite
-
-class Alien(Sprite):
+class Alien:
     """A class to represent a single alien in the fleet."""
     
+    # Aliens are views handed out and reused by the Fleet, so keep them small.
+    __slots__ = ('screen', 'settings', 'image', 'rect', 'x')
+    
     def __init__(self, ai_game):
         """Initialize the alien and its starting position"""
-        super().__init__()
         self.screen = ai_game.screen
         self.settings = ai_game.settings
         
         # Load the alien image and set it's rect atrribute
-        self.image = pygame.image.load('images/alien.bmp')
+        #   The image is shared with every other alien through the asset cache.
+        self.image = ai_game.assets.load_image('images/alien.bmp')
         self.rect = self.image.get_rect()
         
         # Start each new alien near the top left of the screen
@@ -19,14 +19,4 @@ class Alien(Sprite):
         self.rect.y = self.rect.height
         
         # Store the alien's exact horizontal position
-        self.x = float(self.rect.x)
-    
-    def check_edges(self):
-        """Return True if alien is at edge of screen"""
-        screen_rect = self.screen.get_rect()
-        return (self.rect.right >= screen_rect.right) or (self.rect.left <= 0)
-    
-    def update(self):
-        """Move the alien to the right"""
-        self.x += self.settings.alien_speed * self.settings.fleet_direction
-        self.rect.x = self.x
\ No newline at end of file
+        self.x = float(self.rect.x)
\ No newline at end of file
@@ -40,61 +40,297 @@ ADDING THE ALIENS
 - Limit the number of ships the player can use, and end the game when the player has used up
   the alloted number of ships.
 """
+from time import perf_counter
+
+# When the game was launched, for measuring how long it takes to start.
+LAUNCHED = perf_counter()
+
+import argparse
 import sys
-from time import sleep
+from contextlib import ExitStack
 
 import pygame
 
 from settings import Settings
+from assets import AssetCache
 from game_stats import GameStats
 from scoreboard import Scoreboard
 from button import Button
 from ship import Ship
-from bullet import Bullet
-from alien import Alien
+from bullet_pool import BulletPool
+from fleet import Fleet
+from formations import get_layout
+from game_input import InputState
+from renderer import DirtyRectRenderer
+from governor import LoadGovernor
+from profiler import FrameProfiler
 
 class AlienInvasion:
     """Overall class to manage game assets and behavior."""
     
-    def __init__(self):
+    def __init__(self, settings=None):
         """Initialize the game, and create game resources"""
-        pygame.init()
+        # Moments of startup as (name, seconds since launch), for --startup-time.
+        self.startup_marks = [('imported', perf_counter() - LAUNCHED)]
+        self._init_pygame()
         self.clock = pygame.time.Clock() #Controls the frame rate
-        self.settings = Settings() # Create an instance of Settings and assign it to the self.settings variable
+        # Use the given settings, or create an instance of Settings and assign it to the self.settings variable
+        self.settings = settings if settings is not None else Settings()
         
-        self.screen = pygame.display.set_mode((self.settings.screen_width, self.settings.screen_height))
-        # This is a "Surface" which allows game element to be displayed
-        pygame.display.set_caption("Alien Invasion")
+        self.screen = self._create_screen()
+        
+        # Images are loaded once and shared by every sprite that uses them.
+        self.assets = AssetCache(self.settings.image_cache_bytes)
 
         # Create an instance to store game statistics.
         #   and create a scoreboard
         self.stats = GameStats(self)
-        self.sb = Scoreboard(self)
+        self.scores = None
+        self.sb = self._create_scoreboard()
         
         self.ship = Ship(self)
-        self.bullets = pygame.sprite.Group()
-        self.aliens = pygame.sprite.Group()
+        self.bullets = BulletPool(self)
+        self.aliens = Fleet(self)
         
-        self._create_fleet()
+        # The score store, HUD and fleet are made after the Play screen shows.
+        self.startup = self._finish_startup()
         
         # Start Alien Invasion in an inactive state.
         self.game_active = False
+        # When the current run began, for the score store.
+        self.run_started = perf_counter()
+        
+        # Ticks left to hold the game still after the ship was hit.
+        self.pause_ticks = 0
+        
+        # Input gathered from the keyboard and mouse for the next tick.
+        self.controls = InputState()
         
         # Make the Play Button
-        self.play_button = Button(self, "Play")
+        self.play_button = self._create_play_button()
+        
+        # Draw only the changed parts of the screen, unless asked for full frames.
+        if self.settings.render_mode == 'dirty':
+            self.renderer = DirtyRectRenderer(self)
+        else:
+            self.renderer = None
+        
+        # Times each phase of the main loop; F3 shows it, F4 saves it.
+        self.profiler = FrameProfiler(self.settings.target_fps or self.settings.logic_rate)
+        
+        # Draws less when frames run late; the profiler reports what it does.
+        self.governor = None
+        if self.settings.adaptive_quality:
+            self.governor = LoadGovernor(self)
+            self.profiler.extra_metrics['governor'] = self.governor.metrics
+        
+        # Runs the logic on its own thread while the game runs pipelined.
+        self.pipeline = None
+        
+        # Records the input of every tick when a replay was asked for.
+        self.recorder = None
+        
+        # Saves every frame drawn when a capture was asked for.
+        self.capture = None
+        
+        # With --startup-time the game stops as soon as it is ready to play.
+        self.measure_startup = False
+        self._mark_startup('initialized')
+    
+    def _init_pygame(self):
+        """Initialize the pygame modules the game needs."""
+        # Only the display and fonts are used; starting sound and joysticks
+        #   as well would only slow the launch down.
+        pygame.display.init()
+        pygame.font.init()
+    
+    def _finish_startup(self):
+        """Make what the Play screen can do without, one piece per frame."""
+        # Past runs are kept on disk; the best one is the high score to beat.
+        self.scores = self._create_score_store()
+        if self.scores:
+            self.stats.high_score = self.scores.high_score()
+        yield
+        self.sb.prep_images()
+        yield
+        self._create_fleet()
+    
+    def _continue_startup(self, all_of_it=False):
+        """Do the next piece of deferred startup work, or all of it."""
+        if self.startup is None:
+            return
+        for _ in self.startup:
+            if not all_of_it:
+                return
+        self.startup = None
+        self._mark_startup('ready')
+    
+    def _mark_startup(self, name):
+        self.startup_marks.append((name, perf_counter() - LAUNCHED))
+    
+    def _report_startup(self):
+        """Print how long each stage of startup took."""
+        print("Startup (ms since launch):")
+        for name, seconds in self.startup_marks:
+            print(f"  {name:<12}{seconds * 1000:8.1f}")
+    
+    def _create_screen(self):
+        """Open the game window and return its surface."""
+        screen = pygame.display.set_mode((self.settings.screen_width, self.settings.screen_height))
+        # This is a "Surface" which allows game element to be displayed
+        pygame.display.set_caption("Alien Invasion")
+        return screen
+    
+    def _create_score_store(self):
+        """Return the store that keeps high scores and past runs."""
+        from score_store import ScoreStore
+        return ScoreStore(self.settings.score_db_path)
+    
+    def _create_scoreboard(self):
+        """Return the scoreboard that draws the score information."""
+        return Scoreboard(self)
+    
+    def _create_play_button(self):
+        """Return the button that starts a new game."""
+        return Button(self, "Play")
         
     def run_game(self):
         """Start the main loop for the game."""
-        while True:
-            self.check_events()
-            
-            if self.game_active:
-                self.ship.update()
-                self._update_bullets()
-                self._update_aliens()
-            
-            self._update_screen()
-            self.clock.tick(60) # The number inside the () determines how many frames per second the game should run
+        self._instrument()
+        tick_time = 1 / self.settings.logic_rate
+        lag = 0.0
+        last_time = perf_counter()
+        if self.settings.render_mode == 'pipelined':
+            from pipeline import GamePipeline
+            self.pipeline = GamePipeline(self)
+        try:
+            while True:
+                self.profiler.start_frame()
+                self.check_events()
+                
+                # Run as many fixed ticks as the time since the last frame
+                #   calls for, so the game's speed doesn't depend on the frame rate.
+                now = perf_counter()
+                lag += now - last_time
+                last_time = now
+                ticks = int(lag / tick_time)
+                tick_limit = (self.governor.tick_limit() if self.governor
+                              else self.settings.max_ticks_per_frame)
+                if ticks > tick_limit:
+                    # Too far behind to catch up; let the game slow down instead.
+                    ticks = tick_limit
+                    lag = ticks * tick_time
+                lag -= ticks * tick_time
+                if self.pipeline:
+                    # The logic thread runs this frame's ticks while the last
+                    #   frame's are drawn.
+                    self.pipeline.start(ticks, self.controls.copy(), lag / tick_time)
+                    if ticks:
+                        self.controls.clear_presses()
+                else:
+                    self.run_ticks(ticks, self.controls)
+                
+                # Draw the game part of the way from the last tick to the next.
+                if not self.governor or self.governor.draw_this_frame():
+                    self._update_screen(lag / tick_time)
+                    if self.capture:
+                        self.capture.add_frame(self.screen)
+                if self.pipeline:
+                    self.pipeline.wait()
+                self.profiler.end_frame()
+                if self.governor:
+                    self.governor.end_frame(self.profiler.frame_times[-1])
+                
+                if self.startup is not None:
+                    if self.profiler.frames == 1:
+                        self._mark_startup('first frame')
+                    self._continue_startup()
+                elif self.measure_startup:
+                    self._report_startup()
+                    return
+                self.clock.tick(self.settings.target_fps) # 0 doesn't wait at all
+        finally:
+            # Quitting exits from inside the loop, so everything is wrapped up
+            #   on the way out. Each callback runs even if another fails, last
+            #   added first, so the logic thread stops before the replay is saved.
+            with ExitStack() as cleanup:
+                if self.scores:
+                    cleanup.callback(self._close_scores)
+                if self.capture:
+                    cleanup.callback(self.capture.close)
+                if self.recorder:
+                    cleanup.callback(self.recorder.save)
+                if self.pipeline:
+                    cleanup.callback(self.pipeline.close)
+    
+    def start_capture(self, directory, image_format='raw'):
+        """Save every frame to directory, as raw RGB or PNG, without slowing the game."""
+        from capture import FrameCapture
+        self.capture = FrameCapture(directory, self.screen, image_format)
+    
+    def snapshot(self):
+        """Return a GameSnapshot of the game as it is now."""
+        from snapshot import GameSnapshot
+        return GameSnapshot.capture(self)
+    
+    def restore(self, snapshot):
+        """Return the game to the state held in snapshot."""
+        snapshot.restore(self)
+    
+    def start_recording(self, path, seed=0):
+        """Record every tick's input to a replay file at path when the game ends."""
+        from replay import ReplayRecorder
+        # The replay starts from the stored high score, so load it now.
+        self._continue_startup(all_of_it=True)
+        self.recorder = ReplayRecorder(self, path, seed)
+    
+    def _instrument(self):
+        """Have the profiler time each phase of the main loop."""
+        self.profiler.instrument(self, 'check_events')
+        self.profiler.instrument(self.ship, 'update', 'ship.update')
+        self.profiler.instrument(self, '_update_bullets')
+        self.profiler.instrument(self, '_check_bullet_alien_collisions')
+        self.profiler.instrument(self, '_update_aliens')
+        self.profiler.instrument(self, '_update_screen')
+        self.profiler.instrument(self, 'present', 'flip')
+        if self.capture:
+            self.profiler.instrument(self.capture, 'add_frame', 'capture')
+    
+    def run_ticks(self, ticks, controls):
+        """Advance the game logic by ticks ticks, all with the same input."""
+        for _ in range(ticks):
+            if self.recorder:
+                self.recorder.record(controls)
+            self.step(controls)
+            controls.clear_presses()
+    
+    def step(self, controls):
+        """Advance the game logic by one tick using the given input."""
+        self.ship.moving_left = controls.left
+        self.ship.moving_right = controls.right
+        if controls.start:
+            self._start_game()
+        if self.pause_ticks:
+            # The game holds still, though input and drawing carry on.
+            self.pause_ticks -= 1
+            self._hold_still()
+            return
+        if controls.fire:
+            self._fire_bullet()
+        
+        if self.game_active:
+            self.ship.update()
+            self._update_bullets()
+            self._update_aliens()
+        else:
+            self._hold_still()
+    
+    def _hold_still(self):
+        """Leave nothing to draw between ticks, for a tick that moves nothing."""
+        self.ship.previous_x = self.ship.x
+        for bullet in self.bullets:
+            bullet.previous_y = bullet.y
+        self.aliens.previous_x = self.aliens.offset_x
     
     def check_events(self):
         """Respond to keypresses and mouse events"""
@@ -108,36 +344,53 @@ class AlienInvasion:
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 mouse_pos = pygame.mouse.get_pos()
                 self._check_play_button(mouse_pos)
+            elif event.type == pygame.WINDOWEXPOSED and self.renderer:
+                # The window contents were lost, so draw everything again.
+                self.renderer.invalidate()
         
     def _check_play_button(self, mouse_pos):
         """Start a new game when the player clicks Play"""
         button_clicked = self.play_button.rect.collidepoint(mouse_pos)
         if button_clicked and not self.game_active:
-            self._start_game()
+            self.controls.start = True
         
     def _check_keydown_events(self, event):
         """Respond to keypresses"""
         if event.key == pygame.K_d:
             # Move the ship to the right
-            self.ship.moving_right = True
+            self.controls.right = True
         elif event.key == pygame.K_a:
-            self.ship.moving_left = True
+            self.controls.left = True
         elif event.key == pygame.K_q:
             sys.exit()
         elif event.key == pygame.K_SPACE:
-            self._fire_bullet()
+            self.controls.fire = True
         elif event.key == pygame.K_p:
-            self._start_game()
+            self.controls.start = True
+        elif event.key == pygame.K_F3:
+            self.profiler.toggle_overlay()
+        elif event.key == pygame.K_F4:
+            self._export_profile()
+    
+    def _export_profile(self):
+        """Save the frame timings as a JSON summary and a Chrome trace."""
+        self.profiler.export_json('profile.json')
+        self.profiler.export_chrome_trace('profile_trace.json')
+        print("Frame timings saved to profile.json and profile_trace.json")
     
     def _start_game(self):
+        # Anything still being set up has to be ready before play starts.
+        self._continue_startup(all_of_it=True)
         # Initialize the dynamic settings when starting game.
         self.settings.initialize_dynamic_settings()
         #Hide the mouse cursor
-        pygame.mouse.set_visible(False)
+        self._set_mouse_visible(False)
         #Reset the game statistics
         self.stats.reset_stats()
         self.sb.prep_images()
         self.game_active = True
+        self.run_started = perf_counter()
+        self.pause_ticks = 0
         
         # Get rid of any remaining bullets and aliens
         self.bullets.empty()
@@ -150,15 +403,14 @@ class AlienInvasion:
     def _check_keyup_events(self, event):
         """Responds to key releases"""
         if event.key == pygame.K_d:
-            self.ship.moving_right = False
+            self.controls.right = False
         elif event.key == pygame.K_a:
-            self.ship.moving_left = False   
+            self.controls.left = False   
         
     def _fire_bullet(self):
-        """Create a new bullet and add it to the bullets group."""
+        """Fire a bullet from the pool if the limit allows it."""
         if len(self.bullets) < self.settings.bullets_allowed:
-            new_bullet = Bullet(self)
-            self.bullets.add(new_bullet)
+            self.bullets.fire()
                     
     
     def _update_bullets(self):
@@ -167,9 +419,7 @@ class AlienInvasion:
         self.bullets.update()
         
         # Get rid of bullets that have dissapeared.
-        for bullet in self.bullets.copy():
-            if bullet.rect.bottom <= 0:
-                self.bullets.remove(bullet)
+        self.bullets.remove_offscreen()
                 
         if not self.aliens:
             # Destroy existing bullets and create new fleet.
@@ -182,11 +432,10 @@ class AlienInvasion:
         """Respond to bullet-alien collisions."""
         # Check for any bullets that have hit aliens.
         #   If so, get rid of the bullet and the alien.
-        collisions = pygame.sprite.groupcollide(self.bullets, self.aliens, True, True)
+        aliens_hit = self.aliens.collide_bullets(self.bullets)
         
-        if collisions:
-            for aliens in collisions.values():
-                self.stats.score += self.settings.alien_points * len(aliens)
+        if aliens_hit:
+            self.stats.score += self.settings.alien_points * aliens_hit
             self.sb.prep_score()
             self.sb.check_high_score()
     
@@ -205,11 +454,9 @@ class AlienInvasion:
     
     def _check_aliens_bottom(self):
         """Check if any aliens have reached the bottom of the screen"""
-        for alien in self.aliens.sprites():
-            if alien.rect.bottom >= self.settings.screen_height:
-                # Treat this the same as if the ship gets hit
-                self._ship_hit()
-                break
+        if self.aliens.reached_bottom(self.settings.screen_height):
+            # Treat this the same as if the ship gets hit
+            self._ship_hit()
     
     def _ship_hit(self):
         """Respond to the ship being hit by an alien"""
@@ -225,18 +472,37 @@ class AlienInvasion:
             self._create_fleet()
             self.ship.center_ship()
             
-            # Pause
-            sleep(0.5)
+            # Pause, without stopping input or drawing.
+            self.pause_ticks = round(self.settings.ship_hit_pause * self.settings.logic_rate)
         else:
             self.game_active = False
-            pygame.mouse.set_visible(True)
+            self._set_mouse_visible(True)
+            # Every ship in reserve was lost, and then the last one.
+            self._record_run(self.settings.ship_limit + 1)
+    
+    def _close_scores(self):
+        """Save the game under way as a run, then close the score store."""
+        # A game still under way when the player quits counts as a run.
+        if self.game_active:
+            self._record_run(self.settings.ship_limit - self.stats.ships_left)
+        self.scores.close()
+    
+    def _record_run(self, ships_lost):
+        """Save the game that just ended to the score store."""
+        if self.scores:
+            duration = perf_counter() - self.run_started
+            self.scores.record_run(self.stats.score, self.stats.level, duration, ships_lost)
+    
+    def _set_mouse_visible(self, visible):
+        """Show or hide the mouse cursor."""
+        pygame.mouse.set_visible(visible)
     
     def _update_aliens(self):
         """Update the positions of all aliens in the fleet"""
         self.aliens.update()
         
         # Look for alien-ship collisions.
-        if pygame.sprite.spritecollideany(self.ship, self.aliens):
+        if self.aliens.collide_rect(self.ship.rect):
             self._ship_hit()
         
         # Look for aliens hitting the bottom of the screen
@@ -246,55 +512,45 @@ class AlienInvasion:
         self._check_fleet_edges()
 
     
-    def _create_alien(self, x_position, y_position):
-        """Create an Alien and place it in the fleet."""
-        new_alien = Alien(self)
-        new_alien.x = x_position
-        new_alien.rect.x = x_position
-        new_alien.rect.y = y_position
-        self.aliens.add(new_alien)
-    
     def _create_fleet(self):
         """Create the fleet of aliens"""
-        # Create an alien and keep adding aliens until there's no room left.
-        # Spacing between aliens is one alien's width.
-        # Spacing between aliens is one alien width and one alien height.
-        alien = Alien(self)
-        alien_width, alien_height = alien.rect.size
-        
-        
-        current_x, current_y = alien_width, alien_height
-        while current_y < (self.settings.screen_height - (3 * alien_height) ):
-            while current_x < (self.settings.screen_width - (2 * alien_width) ):
-                self._create_alien(current_x, current_y)
-                current_x += 2 * alien_width
-
-            # Finished a row; reset x value and increment y value
-            current_x = alien_width
-            current_y += 2 * alien_height
+        # The layout for this screen and alien size is only worked out once;
+        #   every later fleet is a copy of it.
+        layout = get_layout(self.settings.fleet_formation,
+                            self.settings.screen_width, self.settings.screen_height,
+                            self.aliens.width, self.aliens.height)
+        self.aliens.spawn_layout(layout)
     
     def _check_fleet_edges(self):
         """Respond appropriately if any aliens have reached an edge."""
-        for alien in self.aliens.sprites():
-            if alien.check_edges():
-                self._change_fleet_direction()
-                break
+        if self.aliens.check_edges():
+            self._change_fleet_direction()
     
     def _change_fleet_direction(self):
         """Drop the entire fleet and change the fleet's direction"""
-        for alien in self.aliens.sprites():
-            alien.rect.y += self.settings.fleet_drop_speed
+        self.aliens.drop(self.settings.fleet_drop_speed)
         self.settings.fleet_direction *= -1
 
-    def _update_screen(self):
-        """Updates images on the screen, and flip to the new screen"""
+    def _update_screen(self, alpha=1.0):
+        """Updates images on the screen, and flip to the new screen
+        
+        Moving things are drawn alpha of the way from where they were before
+        the last tick to where they are now.
+        """
+        if self.pipeline:
+            # Draw what the logic thread captured, already placed for alpha.
+            self.pipeline.draw()
+            return
+        if self.renderer:
+            # Redraw and present only what changed since the last frame.
+            self.renderer.draw(alpha)
+            return
         
         # Redraw the screen during each pass through the loop
         self.screen.fill(self.settings.bg_color)
-        for bullet in self.bullets.sprites():
-            bullet.draw_bullet()
-        self.ship.blitme()
-        self.aliens.draw(self.screen)
+        self.bullets.draw(self.screen, alpha)
+        self.ship.blitme(alpha)
+        self.aliens.draw(self.screen, alpha)
         
         # Draw the score information.
         self.sb.show_score()
@@ -303,10 +559,39 @@ class AlienInvasion:
         if not self.game_active:
             self.play_button.draw_button()
         
+        # Draw the frame timings if they were asked for.
+        overlay = self.profiler.overlay_item()
+        if overlay:
+            self.screen.blit(*overlay)
+        
         # Make the most recently drawn screen visible
-        pygame.display.flip()
+        self.present()
+    
+    def present(self, rects=None):
+        """Make the drawn screen visible, or only the given parts of it."""
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
     
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play Alien Invasion.")
+    parser.add_argument('--record', metavar='PATH', help="save a replay of the session to PATH")
+    parser.add_argument('--seed', type=int, default=0, help="random seed stored in the replay")
+    parser.add_argument('--capture', metavar='DIR', help="save every frame to DIR")
+    parser.add_argument('--capture-format', choices=('raw', 'png'), default='raw')
+    parser.add_argument('--startup-time', action='store_true',
+                        help="report how long startup takes, then quit")
+    args = parser.parse_args()
+    if args.seed < 0:
+        # Replays store the seed as an unsigned number.
+        parser.error("--seed can't be negative")
+    
     # Make a game instance, and run the game
     ai = AlienInvasion()
+    if args.record:
+        ai.start_recording(args.record, args.seed)
+    if args.capture:
+        ai.start_capture(args.capture, args.capture_format)
+    ai.measure_startup = args.startup_time
     ai.run_game()
\ No newline at end of file
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+
+import pygame
+
+class AssetCache:
+    """A class to load game images once and share them between sprites."""
+
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        """Initialize an empty cache that holds at most max_bytes of pixels."""
+        self.max_bytes = max_bytes
+        self.images = OrderedDict()
+        self.total_bytes = 0
+
+        # The display surface the cached images were converted for.
+        self.display = None
+
+        # Fonts by (name, size). They hold no pixels, so they never count
+        #   against the budget.
+        self.fonts = {}
+
+    def load_image(self, path):
+        """Return the image at path, loading and converting it on first use."""
+        self._check_display()
+
+        image = self.images.get(path)
+        if image is not None:
+            # Mark the image as the most recently used one.
+            self.images.move_to_end(path)
+            return image
+
+        image = pygame.image.load(path)
+        if self.display is not None:
+            # Match the display's pixel format so blits don't convert each frame.
+            image = image.convert()
+
+        self.images[path] = image
+        self.total_bytes += self._image_bytes(image)
+        self._evict()
+        return image
+
+    def load_font(self, name, size):
+        """Return the font file name at size, or pygame's default font if name is None.
+
+        Fonts are opened directly instead of through SysFont(), which scans
+        every font installed on the system the first time it is used.
+        """
+        font = self.fonts.get((name, size))
+        if font is None:
+            font = self.fonts[(name, size)] = pygame.font.Font(name, size)
+        return font
+
+    def clear(self):
+        """Forget every cached image."""
+        self.images.clear()
+        self.total_bytes = 0
+
+    def _check_display(self):
+        """Drop the cache if the display surface has changed since the last load."""
+        display = pygame.display.get_surface() if pygame.display.get_init() else None
+        if display is not self.display:
+            self.clear()
+            self.display = display
+
+    def _evict(self):
+        """Remove the least recently used images until the cache fits its budget."""
+        # Always keep the newest image, even if it is bigger than the budget.
+        while self.total_bytes > self.max_bytes and len(self.images) > 1:
+            path, image = self.images.popitem(last=False)
+            self.total_bytes -= self._image_bytes(image)
+
+    def _image_bytes(self, image):
+        """Return the number of bytes used by the pixels of image."""
+        return image.get_width() * image.get_height() * image.get_bytesize()
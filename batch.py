@@ -0,0 +1,126 @@
+"""Play many headless games of Alien Invasion in parallel and record the results.
+
+Example:
+    python batch.py --grid alien_speed=1.0,1.5 --grid bullets_allowed=3,10 \\
+        --policies tracking,random --seeds 100 --out results.csv
+"""
+
+import argparse
+import ast
+import csv
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from settings import Settings
+
+class TunedSettings(Settings):
+    """Settings with some values replaced, including the dynamic ones."""
+
+    def __init__(self, overrides):
+        """Initialize the settings, then apply overrides by attribute name."""
+        # Checked before anything is applied, since applying an override
+        #   creates the attribute whether or not it is a real setting.
+        names = vars(Settings()).keys()
+        for name in overrides:
+            if name not in names:
+                raise ValueError(f"unknown setting: {name}")
+
+        self.overrides = dict(overrides)
+        super().__init__()
+
+    def initialize_dynamic_settings(self):
+        """Reset the dynamic settings, keeping the overridden starting values."""
+        super().initialize_dynamic_settings()
+        for name, value in self.overrides.items():
+            setattr(self, name, value)
+
+def make_jobs(grid, policies, seeds, max_ticks):
+    """Return one job for every combination of settings, policy and seed.
+
+    grid maps setting names to the list of values to try.
+    """
+    names = sorted(grid)
+    combinations = itertools.product(*(grid[name] for name in names))
+    jobs = []
+    for values in combinations:
+        overrides = dict(zip(names, values))
+        for policy in policies:
+            for seed in seeds:
+                jobs.append((len(jobs), overrides, policy, seed, max_ticks))
+    return jobs
+
+def play_game(job):
+    """Play the game described by job and return its result as a dict."""
+    # Imported here so that only the worker processes load pygame.
+    from headless import HeadlessGame, make_policy
+
+    job_id, overrides, policy, seed, max_ticks = job
+    game = HeadlessGame(TunedSettings(overrides))
+    game.reset()
+    ticks = game.run(max_ticks, make_policy(policy, seed))
+
+    result = {'job': job_id, 'policy': policy, 'seed': seed}
+    result.update(overrides)
+    result.update({
+        'score': game.stats.score,
+        'level': game.stats.level,
+        'ships_left': game.stats.ships_left,
+        'ticks': ticks,
+        'game_over': not game.game_active,
+    })
+    return result
+
+def run_batch(jobs, path, workers=None, chunksize=16):
+    """Play every job across a pool of processes, streaming results to a CSV file.
+
+    Rows are written as soon as each chunk of games finishes, in job order.
+    Return the number of games played.
+    """
+    if not jobs:
+        return 0
+
+    names = sorted(jobs[0][1])
+    fields = ['job', 'policy', 'seed'] + names + ['score', 'level', 'ships_left',
+                                                  'ticks', 'game_over']
+    played = 0
+    with open(path, 'w', newline='') as file, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        writer = csv.DictWriter(file, fieldnames=fields)
+        writer.writeheader()
+        for result in executor.map(play_game, jobs, chunksize=chunksize):
+            writer.writerow(result)
+            played += 1
+            if played % chunksize == 0:
+                file.flush()
+    return played
+
+def _parse_grid(entries):
+    """Turn 'name=v1,v2' strings into a dict of names and value lists."""
+    grid = {}
+    for entry in entries:
+        name, values = entry.split('=', 1)
+        grid[name] = [ast.literal_eval(value) for value in values.split(',')]
+    return grid
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--grid', action='append', default=[], metavar='NAME=V1,V2',
+                        help="setting values to try; may be given more than once")
+    parser.add_argument('--policies', default='tracking')
+    parser.add_argument('--seeds', type=int, default=10, help="number of seeds per combination")
+    parser.add_argument('--ticks', type=int, default=50_000, help="tick limit for each game")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--out', default='batch_results.csv')
+    args = parser.parse_args()
+
+    grid = _parse_grid(args.grid)
+    # Catch a misspelled setting before any game is played.
+    try:
+        TunedSettings({name: values[0] for name, values in grid.items()})
+    except ValueError as error:
+        parser.error(str(error))
+    jobs = make_jobs(grid, args.policies.split(','), range(args.seeds), args.ticks)
+    played = run_batch(jobs, args.out, args.workers)
+    print(f"{played} games written to {args.out}")
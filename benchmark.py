@@ -0,0 +1,168 @@
+"""Benchmark Alien Invasion through fixed, scripted scenarios.
+
+Every scenario runs in its own process so peak memory is measured per scenario.
+Results can be saved as a baseline and later runs compared against it:
+
+    python benchmark.py --save baseline.json
+    python benchmark.py --compare baseline.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+from alien_invasion import AlienInvasion
+from batch import TunedSettings
+from headless import HeadlessGame, make_policy
+
+# Each scenario: settings to override, number of ticks, how to drive the ship
+#   and any extra setup done after the game starts.
+SCENARIOS = {
+    'full_fleet': {'settings': {}, 'ticks': 3000, 'policy': 'tracking'},
+    '4k_screen': {'settings': {'screen_width': 3840, 'screen_height': 2160},
+                  'ticks': 1500, 'policy': 'tracking'},
+    'bullets_3': {'settings': {'bullet_width': 3, 'bullets_allowed': 3},
+                  'ticks': 3000, 'policy': 'tracking'},
+    'bullets_100': {'settings': {'bullet_width': 3, 'bullets_allowed': 100},
+                    'ticks': 1000, 'policy': 'tracking'},
+    'bullets_1000': {'settings': {'bullet_width': 3, 'bullets_allowed': 1000},
+                     'ticks': 1000, 'policy': 'tracking'},
+    'late_level': {'settings': {'bullet_width': 3}, 'ticks': 3000, 'policy': 'tracking',
+                   'setup': 'late_level'},
+    'ship_hits': {'settings': {}, 'ticks': 1000, 'policy': 'idle', 'setup': 'ship_hits'},
+}
+
+# Tracing allocations is slow, so that pass only plays the start of each scenario.
+TRACED_TICKS = 300
+
+def run_scenario(name, render=False, trace_memory=False):
+    """Play one scenario and return its measurements as a dict."""
+    # The render path draws every frame into a window nobody sees.
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+    scenario = SCENARIOS[name]
+    settings = TunedSettings(scenario['settings'])
+    game = RenderedGame(settings) if render else HeadlessGame(settings)
+    game.reset()
+    setup = scenario.get('setup')
+    if setup == 'late_level':
+        # The speeds reached after twenty cleared waves.
+        for _ in range(20):
+            game.settings.increase_speed()
+    policy = make_policy(scenario['policy'], seed=0)
+
+    ticks = min(scenario['ticks'], TRACED_TICKS) if trace_memory else scenario['ticks']
+    if trace_memory:
+        tracemalloc.start()
+    start = perf_counter()
+    for tick in range(ticks):
+        game.step(policy(game, tick))
+        if setup == 'ship_hits':
+            # Lose a ship every tick, without ever running out.
+            game.stats.ships_left = game.settings.ship_limit
+            game._ship_hit()
+        if render:
+            game._update_screen()
+    elapsed = perf_counter() - start
+
+    result = {
+        'scenario': name,
+        'path': 'render' if render else 'logic',
+        'ticks': ticks,
+        'ticks_per_second': ticks / elapsed,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        # The final state shows whether the scenario still plays the same way.
+        'final_score': game.stats.score,
+        'final_level': game.stats.level,
+    }
+    if trace_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['allocated_peak_bytes'] = peak
+    return result
+
+class RenderedGame(AlienInvasion):
+    """The full game, drawing every frame, but never waiting on a clock."""
+
+    def _create_score_store(self):
+        return None
+
+    def reset(self):
+        """Start a new game, as if the player had pressed Play."""
+        self._start_game()
+
+def run_suite(names, paths=('logic', 'render')):
+    """Run each scenario on each path in a fresh process; return the results."""
+    results = []
+    for name in names:
+        for path in paths:
+            render = path == 'render'
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                result = executor.submit(run_scenario, name, render).result()
+            # Allocations are measured in a second run, since tracing slows it down.
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                traced = executor.submit(run_scenario, name, render, True).result()
+            result['allocated_peak_bytes'] = traced['allocated_peak_bytes']
+            results.append(result)
+    return results
+
+def compare(results, baseline, tolerance):
+    """Return a message for every result that is worse than the baseline."""
+    previous = {(entry['scenario'], entry['path']): entry for entry in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get((result['scenario'], result['path']))
+        if old is None:
+            continue
+        label = f"{result['scenario']} ({result['path']})"
+        if result['ticks_per_second'] < old['ticks_per_second'] * (1 - tolerance):
+            regressions.append(f"{label}: {result['ticks_per_second']:,.0f} ticks/s, "
+                               f"was {old['ticks_per_second']:,.0f}")
+        for key in ('allocated_peak_bytes', 'peak_rss_kb'):
+            if result[key] > old[key] * (1 + tolerance):
+                regressions.append(f"{label}: {key} {result[key]:,}, was {old[key]:,}")
+        if (result['final_score'], result['final_level']) != (old['final_score'], old['final_level']):
+            regressions.append(f"{label}: game played differently than the baseline")
+    return regressions
+
+def _print_results(results):
+    """Print the results as a table."""
+    print(f"{'scenario':<14}{'path':<8}{'ticks/s':>12}{'alloc peak KB':>15}{'peak RSS KB':>13}")
+    for result in results:
+        print(f"{result['scenario']:<14}{result['path']:<8}"
+              f"{result['ticks_per_second']:>12,.0f}"
+              f"{result['allocated_peak_bytes'] // 1024:>15,}"
+              f"{result['peak_rss_kb']:>13,}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('scenarios', nargs='*', default=sorted(SCENARIOS),
+                        help="scenarios to run (default: all)")
+    parser.add_argument('--logic-only', action='store_true', help="skip the render path")
+    parser.add_argument('--save', metavar='PATH', help="save the results as a baseline")
+    parser.add_argument('--compare', metavar='PATH', help="compare against a saved baseline")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="allowed slowdown or growth before flagging (default 0.10)")
+    args = parser.parse_args()
+
+    paths = ('logic',) if args.logic_only else ('logic', 'render')
+    results = run_suite(args.scenarios, paths)
+    _print_results(results)
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
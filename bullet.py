@@ -1,31 +1,44 @@
 import pygame
-from pygame.sprite import Sprite
 
-class Bullet(Sprite):
+class Bullet:
     """A class to manage bullets fired from the ship"""
     
+    # Bullets are reused by the BulletPool, so keep them small and fixed.
+    __slots__ = ('screen', 'settings', 'color', 'rect', 'y', 'previous_y')
+    
     def __init__(self, ai_game):
         """Create a bullet object at the ship's current position."""
-        super().__init__()
         self.screen = ai_game.screen
         self.settings = ai_game.settings
         self.color = self.settings.bullet_color
         
         # Create a bullet rect at (0, 0) and then set correct position
         self.rect = pygame.Rect(0, 0, self.settings.bullet_width, self.settings.bullet_height)
-        self.rect.midtop = ai_game.ship.rect.midtop
+        self.reset(ai_game.ship.rect.midtop)
+    
+    def reset(self, midtop):
+        """Place the bullet at midtop, ready to be fired again."""
+        self.color = self.settings.bullet_color
+        self.rect.size = (self.settings.bullet_width, self.settings.bullet_height)
+        self.rect.midtop = midtop
         
-        # Store the bullet's position as a float
+        # Store the bullet's position as a float, and where it was before
+        #   the last update for drawing between ticks.
         self.y = float(self.rect.y)
+        self.previous_y = self.y
     
     def update(self):
         """Move the bullet up the screen"""
         # Update the exact position of the bullet
+        self.previous_y = self.y
         self.y -= self.settings.bullet_speed
         # Update the rect position
         self.rect.y = self.y
     
-    def draw_bullet(self):
-        """Draw the bullet to the screen."""
-        pygame.draw.rect(self.screen, self.color, self.rect)
-    
\ No newline at end of file
+    def draw_rect(self, alpha=1.0):
+        """Return the bullet's rect alpha of the way from its last position to this one."""
+        if alpha >= 1.0:
+            return self.rect.copy()
+        rect = self.rect.copy()
+        rect.y = self.previous_y + (self.y - self.previous_y) * alpha
+        return rect
@@ -0,0 +1,94 @@
+import pygame
+
+from bullet import Bullet
+
+class BulletPool:
+    """A class to manage the bullets in flight, reusing bullets that have gone."""
+
+    def __init__(self, ai_game):
+        """Initialize an empty pool."""
+        self.ai_game = ai_game
+
+        # Bullets in flight, in the order they were fired, and spare bullets.
+        self.active = []
+        self.free = []
+
+        # Solid bullet images by (color, size), so bullets are blitted in one batch.
+        self.images = {}
+
+    def __len__(self):
+        return len(self.active)
+
+    def __bool__(self):
+        return bool(self.active)
+
+    def __iter__(self):
+        return iter(self.active)
+
+    def sprites(self):
+        """Return a list of the bullets in flight."""
+        return list(self.active)
+
+    def fire(self):
+        """Put a bullet in flight from the ship's current position and return it."""
+        if self.free:
+            bullet = self.free.pop()
+            bullet.reset(self.ai_game.ship.rect.midtop)
+        else:
+            bullet = Bullet(self.ai_game)
+        self.active.append(bullet)
+        return bullet
+
+    def update(self):
+        """Move every bullet in flight."""
+        for bullet in self.active:
+            bullet.update()
+
+    def remove_offscreen(self):
+        """Take the bullets that have left the top of the screen out of flight."""
+        self._keep(lambda bullet: bullet.rect.bottom > 0)
+
+    def release(self, bullets):
+        """Take the given bullets out of flight."""
+        gone = set(map(id, bullets))
+        self._keep(lambda bullet: id(bullet) not in gone)
+
+    def empty(self):
+        """Take every bullet out of flight."""
+        self.free.extend(self.active)
+        self.active.clear()
+
+    def draw(self, surface, alpha=1.0):
+        """Draw every bullet in flight to surface with a single blits() call."""
+        surface.blits([(self.image(bullet.color, bullet.rect.size), bullet.draw_rect(alpha))
+                       for bullet in self.active], doreturn=False)
+
+    def image(self, color, size):
+        """Return a bullet image of the given color and size."""
+        image = self.images.get((color, size))
+        if image is None:
+            # Match the screen's pixel format so blits don't convert each frame.
+            image = pygame.Surface(size, 0, self.ai_game.screen)
+            image.fill(color)
+            self.images[(color, size)] = image
+        return image
+
+    def restore(self, rects, ys):
+        """Replace the bullets in flight with ones at the given rects and exact y values."""
+        self.empty()
+        for rect, y in zip(rects, ys):
+            bullet = self.fire()
+            bullet.rect.update(rect)
+            bullet.y = bullet.previous_y = y
+
+    def _keep(self, wanted):
+        """Keep the bullets for which wanted() is true; the others become spares."""
+        # Compact the list in place instead of copying it.
+        kept = 0
+        for bullet in self.active:
+            if wanted(bullet):
+                self.active[kept] = bullet
+                kept += 1
+            else:
+                self.free.append(bullet)
+        del self.active[kept:]
@@ -0,0 +1,127 @@
+import json
+import os
+import queue
+import struct
+import threading
+import zlib
+
+import numpy as np
+
+class FrameCapture:
+    """A class to save the game's frames from a background thread.
+
+    Each frame is copied row by row straight out of the screen's pixel
+    buffer into one of a few preallocated buffers, and a writer thread turns
+    it into RGB and saves it as raw frames or as a PNG. When the writer falls
+    behind and no buffer is free, the frame is dropped and counted, so the
+    game loop never waits on the disk.
+    """
+
+    def __init__(self, directory, surface, image_format='raw', buffers=8):
+        """Initialize the capture of surface's frames and start the writer thread."""
+        if image_format not in ('raw', 'png'):
+            raise ValueError(f"unknown capture format: {image_format!r}")
+        self.bytesize = surface.get_bytesize()
+        if self.bytesize not in (3, 4):
+            raise ValueError("frames can only be captured from 24 or 32 bit surfaces")
+        self.directory = directory
+        self.width, self.height = surface.get_size()
+        self.image_format = image_format
+        os.makedirs(directory, exist_ok=True)
+
+        # Where red, green and blue sit in each pixel's bytes.
+        self.channels = [shift // 8 for shift in surface.get_shifts()[:3]]
+
+        # Frames waiting to be written, and the buffers that are free to fill.
+        self.pending = queue.Queue()
+        self.free = queue.Queue()
+        for _ in range(buffers):
+            self.free.put(np.empty((self.height, self.width, self.bytesize), dtype=np.uint8))
+
+        self.frames_seen = 0
+        self.frames_written = 0
+        self.frames_dropped = 0
+        # The numbers of the frames that were saved, so gaps can be found later.
+        self.written = []
+
+        self.raw_file = None
+        if image_format == 'raw':
+            self.raw_file = open(os.path.join(directory, 'frames.raw'), 'wb')
+        self.thread = threading.Thread(target=self._write_frames, name='frame-capture',
+                                       daemon=True)
+        self.thread.start()
+
+    def add_frame(self, surface):
+        """Queue a copy of surface to be saved; return False if it was dropped."""
+        number = self.frames_seen
+        self.frames_seen += 1
+        try:
+            buffer = self.free.get_nowait()
+        except queue.Empty:
+            self.frames_dropped += 1
+            return False
+
+        # The array shares the surface's memory; the only copy is into the buffer.
+        rows = np.frombuffer(surface.get_buffer(), dtype=np.uint8)
+        rows = rows.reshape(self.height, surface.get_pitch())[:, :self.width * self.bytesize]
+        np.copyto(buffer, rows.reshape(self.height, self.width, self.bytesize))
+        del rows
+        self.pending.put((number, buffer))
+        return True
+
+    def close(self):
+        """Write the frames still queued, stop the thread and save the index."""
+        self.pending.put(None)
+        self.thread.join()
+        if self.raw_file:
+            self.raw_file.close()
+
+        index = {
+            'width': self.width,
+            'height': self.height,
+            'format': 'rgb24' if self.image_format == 'raw' else 'png',
+            'frames_seen': self.frames_seen,
+            'frames_written': self.frames_written,
+            'frames_dropped': self.frames_dropped,
+            'frames': self.written,
+        }
+        with open(os.path.join(self.directory, 'frames.json'), 'w') as file:
+            json.dump(index, file)
+
+    def _write_frames(self):
+        """Save queued frames until close() is called."""
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            number, buffer = item
+            # Converting makes a copy, so the buffer can be refilled already.
+            rgb = np.ascontiguousarray(buffer[:, :, self.channels])
+            self.free.put(buffer)
+            if self.raw_file:
+                self.raw_file.write(rgb.data)
+            else:
+                path = os.path.join(self.directory, f'frame_{number:06}.png')
+                with open(path, 'wb') as file:
+                    file.write(_encode_png(rgb))
+            self.written.append(number)
+            self.frames_written += 1
+
+def _encode_png(rgb):
+    """Return an RGB image array encoded as PNG bytes.
+
+    zlib lets go of the GIL while it compresses, unlike pygame.image.save(),
+    so encoding on the writer thread doesn't hold up the game loop.
+    """
+    height, width, _ = rgb.shape
+    # Every row starts with a filter type byte; 0 leaves the row as it is.
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 1:] = rgb.reshape(height, width * 3)
+
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data
+                + struct.pack('>I', zlib.crc32(kind + data)))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b''.join((b'\x89PNG\r\n\x1a\n', chunk(b'IHDR', header),
+                     chunk(b'IDAT', zlib.compress(rows.data, 1)), chunk(b'IEND', b'')))
@@ -0,0 +1,130 @@
+"""Play games on an Alien Invasion server from scripted clients on this machine.
+
+Each client connects, presses Play, then sends random input and follows
+its game through the deltas the server sends back. With --serve, the
+server runs in the same process, so the whole loop can be tried at once:
+
+    python client.py --serve --clients 200 --seconds 10
+"""
+
+import argparse
+import asyncio
+import json
+from time import perf_counter
+
+from game_input import InputState
+from headless import RandomPolicy
+from state_delta import LENGTH, RemoteState
+
+class GameClient:
+    """A class to play one game on a server and keep a copy of its state."""
+
+    def __init__(self, reader, writer):
+        """Initialize a client on an open connection; use connect() to make one."""
+        self.reader = reader
+        self.writer = writer
+        self.state = RemoteState()
+
+        # Deltas received, the bytes they took and the last input sent.
+        self.deltas = 0
+        self.bytes_received = 0
+        self.bits = None
+
+    @classmethod
+    async def connect(cls, overrides=None, host='127.0.0.1', port=8765, path=None):
+        """Connect to a server by TCP port, or by Unix socket path, and start a session."""
+        if path:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        writer.write(json.dumps(overrides or {}).encode() + b'\n')
+        return cls(reader, writer)
+
+    def send(self, controls):
+        """Send input; nothing is sent if it is the same as last time and has no presses."""
+        bits = controls.to_bits()
+        if bits == self.bits and not (controls.fire or controls.start):
+            return
+        self.writer.write(bytes((bits,)))
+        self.bits = bits
+
+    async def receive(self):
+        """Wait for the next delta and apply it to the state."""
+        header = await self.reader.readexactly(LENGTH.size)
+        (size,) = LENGTH.unpack(header)
+        if not size:
+            # The server ended the session and says why.
+            reason = await self.reader.readline()
+            raise ConnectionError(reason.decode().strip())
+        delta = await self.reader.readexactly(size)
+        self.state.apply(delta)
+        self.deltas += 1
+        self.bytes_received += LENGTH.size + size
+
+    async def close(self):
+        """Leave the server."""
+        self.writer.close()
+        await self.writer.wait_closed()
+
+async def play(client, seconds, seed=None):
+    """Play randomly on client for the given time; return the ticks seen per second."""
+    policy = RandomPolicy(seed)
+    client.send(InputState(start=True))
+    start = perf_counter()
+    first_tick = None
+    while perf_counter() - start < seconds:
+        await client.receive()
+        if first_tick is None:
+            first_tick = client.state.tick
+        if not client.state.game_active:
+            client.send(InputState(start=True))
+        else:
+            client.send(policy(None, client.state.tick))
+    return (client.state.tick - first_tick) / (perf_counter() - start)
+
+async def _main(args):
+    server = None
+    if args.serve:
+        # Imported here so that clients of a separate server don't load it.
+        from server import GameServer
+        server = GameServer()
+        serving = asyncio.create_task(server.serve(args.host, args.port, args.unix))
+        await asyncio.sleep(0.1)
+
+    overrides = json.loads(args.settings)
+    clients = []
+    for _ in range(args.clients):
+        clients.append(await GameClient.connect(overrides, args.host, args.port, args.unix))
+    rates = await asyncio.gather(*(play(client, args.seconds, seed)
+                                   for seed, client in enumerate(clients)))
+
+    deltas = sum(client.deltas for client in clients)
+    received = sum(client.bytes_received for client in clients)
+    print(f"{len(clients)} clients: {min(rates):.1f} to {max(rates):.1f} ticks/s each, "
+          f"{received / max(deltas, 1):.0f} bytes per delta")
+    if server:
+        metrics = server.metrics()
+        print(f"server: {metrics['ticks_per_second']:.1f} ticks/s, load {metrics['load']:.0%}, "
+              f"late {metrics['late_ticks']}, dropped {metrics['dropped_ticks']}, "
+              f"held {metrics['deltas_held']}")
+    for client in clients:
+        await client.close()
+    if server:
+        # Let the sessions see their clients leave before the server stops.
+        while server.sessions:
+            await asyncio.sleep(0.01)
+        serving.cancel()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help="connect by a Unix socket instead")
+    parser.add_argument('--clients', type=int, default=1)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--settings', default='{}', help="settings to override, as JSON")
+    parser.add_argument('--serve', action='store_true',
+                        help="run the server in this process as well")
+    args = parser.parse_args()
+    asyncio.run(_main(args))
@@ -0,0 +1,103 @@
+from math import floor
+
+import numpy as np
+
+class SpatialHash:
+    """A uniform grid that finds the fleet slots near a rect without testing them all."""
+
+    def __init__(self, cell_width, cell_height):
+        """Initialize an empty grid with cells of the given size."""
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.cells = {}
+        self.count = 0
+
+        # The fleet moves as one block, so instead of re-hashing every alien
+        #   the grid keeps the fleet's offset from where they were inserted.
+        self.dx = 0.0
+        self.dy = 0.0
+
+        # Range of occupied columns and rows, used to clip very wide queries.
+        self.min_col = self.max_col = 0
+        self.min_row = self.max_row = 0
+
+    def build(self, xs, ys, width, height):
+        """Replace the contents of the grid with boxes of one size at xs, ys."""
+        members = {}
+        for index, (x, y) in enumerate(zip(xs.tolist(), ys.tolist())):
+            cols = range(x // self.cell_width, (x + width - 1) // self.cell_width + 1)
+            rows = range(y // self.cell_height, (y + height - 1) // self.cell_height + 1)
+            for col in cols:
+                for row in rows:
+                    members.setdefault((col, row), []).append(index)
+
+        # The cells never change once built, so grids can share them.
+        self.cells = {key: np.array(indices, dtype=np.int64) for key, indices in members.items()}
+        self.count = len(xs)
+        self.dx = self.dy = 0.0
+
+        if self.cells:
+            self.min_col = min(col for col, row in self.cells)
+            self.max_col = max(col for col, row in self.cells)
+            self.min_row = min(row for col, row in self.cells)
+            self.max_row = max(row for col, row in self.cells)
+
+    def share(self, other):
+        """Make this grid a fresh copy of other without copying its cells."""
+        self.cells = other.cells
+        self.count = other.count
+        self.dx = self.dy = 0.0
+        self.min_col, self.max_col = other.min_col, other.max_col
+        self.min_row, self.max_row = other.min_row, other.max_row
+
+    def move_to(self, dx, dy):
+        """Record that every box in the grid is now offset by dx, dy."""
+        self.dx = dx
+        self.dy = dy
+
+    def remove(self, indices):
+        """Note that the boxes with the given indices are gone.
+
+        The cells are shared and left as they are, so query() can still return
+        removed boxes; the caller filters them out.
+        """
+        self.count -= len(indices)
+
+    def query(self, rect):
+        """Return an array of the indices whose cells overlap rect, or None for all."""
+        # Work in the grid's own coordinates, with a pixel of slack for the
+        #   rounding of each alien's rect.
+        left = floor(rect.left - self.dx) - 1
+        right = floor(rect.right - self.dx) + 1
+        top = floor(rect.top - self.dy) - 1
+        bottom = floor(rect.bottom - self.dy) + 1
+
+        min_col = max(left // self.cell_width, self.min_col)
+        max_col = min(right // self.cell_width, self.max_col)
+        min_row = max(top // self.cell_height, self.min_row)
+        max_row = min(bottom // self.cell_height, self.max_row)
+        if min_col > max_col or min_row > max_row or not self.count:
+            return np.zeros(0, dtype=np.int64)
+
+        # A query that spans more cells than there are boxes is cheaper to
+        #   answer with every box; the caller tests them exactly anyway.
+        cell_count = (max_col - min_col + 1) * (max_row - min_row + 1)
+        if cell_count > self.count:
+            return None
+
+        found = []
+        for col in range(min_col, max_col + 1):
+            for row in range(min_row, max_row + 1):
+                members = self.cells.get((col, row))
+                if members is not None:
+                    found.append(members)
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        if len(found) == 1:
+            return found[0]
+        # A box that spans several cells is listed once per cell; keep one.
+        found = np.sort(np.concatenate(found))
+        keep = np.empty(len(found), dtype=bool)
+        keep[0] = True
+        np.not_equal(found[1:], found[:-1], out=keep[1:])
+        return found[keep]
@@ -0,0 +1,492 @@
+"""Reinforcement learning environments for Alien Invasion.
+
+AlienInvasionEnv wraps one headless game; VectorAlienInvasionEnv plays many
+games at once with their whole state held in arrays, so one call to step()
+advances every game with a handful of array operations. Both follow the
+Gymnasium conventions without depending on it:
+
+    obs, info = env.reset()
+    obs, reward, terminated, truncated, info = env.step(action)
+
+The reward is the change in score, and an episode terminates when the last
+ship is lost. Observations are either a compact feature vector ('features')
+or a downsampled picture of the screen ('pixels').
+"""
+
+import numpy as np
+
+from formations import get_layout
+from game_input import InputState
+from headless import HeadlessGame
+from settings import Settings
+
+# The actions an agent can take, as the input they give for one tick.
+ACTIONS = (
+    InputState(),
+    InputState(left=True),
+    InputState(right=True),
+    InputState(fire=True),
+    InputState(left=True, fire=True),
+    InputState(right=True, fire=True),
+)
+
+# Values of each kind of object in a pixel observation.
+SHIP_PIXEL = 85
+ALIEN_PIXEL = 170
+BULLET_PIXEL = 255
+
+# Features ahead of the one-per-slot alive flags in a feature observation.
+FEATURE_NAMES = ('ship_x', 'fleet_x', 'fleet_y', 'fleet_direction', 'fleet_depth',
+                 'bullets', 'ships_left')
+
+class AlienInvasionEnv:
+    """An environment that plays a single headless game."""
+
+    def __init__(self, settings=None, observation='features', pixel_scale=8, max_ticks=50_000):
+        """Initialize the environment around a new headless game."""
+        if observation not in ('features', 'pixels'):
+            raise ValueError(f"unknown observation type: {observation!r}")
+        self.game = HeadlessGame(settings)
+        self.settings = self.game.settings
+        self.observation = observation
+        self.pixel_scale = pixel_scale
+        self.max_ticks = max_ticks
+        self.action_count = len(ACTIONS)
+
+    def reset(self, seed=None):
+        """Start a new game and return its first observation and an info dict.
+
+        The game has no randomness, so seed is accepted only for compatibility.
+        """
+        self.game.reset()
+        self.game.ticks = 0
+        return self._observe(), self._info()
+
+    def step(self, action):
+        """Play one tick with the given action index; return the Gymnasium 5-tuple."""
+        game = self.game
+        score = game.stats.score
+        game.step(ACTIONS[action])
+        game.ticks += 1
+
+        reward = game.stats.score - score
+        terminated = not game.game_active
+        truncated = not terminated and self.max_ticks is not None and game.ticks >= self.max_ticks
+        return self._observe(), reward, terminated, truncated, self._info()
+
+    def _info(self):
+        stats = self.game.stats
+        return {'score': stats.score, 'level': stats.level, 'ships_left': stats.ships_left}
+
+    def _observe(self):
+        """Return the observation of the game as it is now."""
+        game = self.game
+        fleet, ship, settings = game.aliens, game.ship, self.settings
+        bullets = game.bullets.active
+        ship_x = np.array([ship.rect.x])
+        bullet_x = np.array([[bullet.rect.x for bullet in bullets]], dtype=np.int64)
+        bullet_y = np.array([[bullet.rect.y for bullet in bullets]], dtype=np.int64)
+        in_flight = np.ones(bullet_x.shape, dtype=bool)
+
+        if self.observation == 'features':
+            depth = fleet.bottom + fleet.offset_y if fleet.count else 0
+            return observe_features(
+                settings, ship_x, ship.rect.width,
+                np.array([fleet.shift_x]), np.array([fleet.offset_y]),
+                np.array([settings.fleet_direction]), np.array([depth]),
+                np.array([len(bullets)]), np.array([game.stats.ships_left]),
+                fleet.alive[None])[0]
+        return observe_pixels(
+            settings, self.pixel_scale, ship_x, ship.rect.top, ship.rect.size,
+            bullet_x, bullet_y, in_flight,
+            fleet.slot_x, fleet.slot_y, (fleet.width, fleet.height),
+            np.array([fleet.shift_x]), np.array([fleet.offset_y]), fleet.alive[None])[0]
+
+class VectorAlienInvasionEnv:
+    """An environment that plays num_envs games at once, with their state in arrays.
+
+    The rules are those of AlienInvasion.step(), written over arrays with one
+    row per game; a game plays out tick for tick the same as a HeadlessGame
+    given the same input. Games that end are started again at once.
+    """
+
+    def __init__(self, num_envs, settings=None, observation='features', pixel_scale=8,
+                 max_ticks=50_000):
+        """Initialize num_envs games that share one set of settings."""
+        if observation not in ('features', 'pixels'):
+            raise ValueError(f"unknown observation type: {observation!r}")
+        self.num_envs = num_envs
+        self.settings = settings if settings is not None else Settings()
+        self.observation = observation
+        self.pixel_scale = pixel_scale
+        self.max_ticks = max_ticks
+        self.action_count = len(ACTIONS)
+
+        # One game is made only to measure the sprites and find the formation.
+        template = HeadlessGame(self.settings)
+        self.ship_size = template.ship.rect.size
+        self.ship_top = template.ship.rect.top
+        self.alien_size = (template.aliens.width, template.aliens.height)
+        layout = get_layout(self.settings.fleet_formation,
+                            self.settings.screen_width, self.settings.screen_height,
+                            *self.alien_size)
+        self.slot_x, self.slot_y = layout.slot_x, layout.slot_y
+        self.slots = len(layout)
+
+        # The starting values of the dynamic settings, which every game resets to.
+        self.settings.initialize_dynamic_settings()
+        self.initial = {name: getattr(self.settings, name) for name in
+                        ('ship_speed', 'bullet_speed', 'alien_speed', 'fleet_direction',
+                         'alien_points')}
+
+        n, bullets = num_envs, self.settings.bullets_allowed
+        self.active = np.zeros(n, dtype=bool)
+        self.ticks = np.zeros(n, dtype=np.int64)
+
+        # Ticks left to hold each game still after its ship was hit.
+        self.pause_ticks = np.zeros(n, dtype=np.int64)
+        self.pause_length = round(self.settings.ship_hit_pause * self.settings.logic_rate)
+
+        # Dynamic settings and stats.
+        self.ship_speed = np.zeros(n)
+        self.bullet_speed = np.zeros(n)
+        self.alien_speed = np.zeros(n)
+        self.fleet_direction = np.zeros(n, dtype=np.int64)
+        self.alien_points = np.zeros(n, dtype=np.int64)
+        self.ships_left = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.level = np.zeros(n, dtype=np.int64)
+
+        # The ship's exact x and its rect's x.
+        self.ship_x = np.zeros(n)
+        self.ship_rect_x = np.zeros(n, dtype=np.int64)
+
+        # Bullets in flight, packed at the front of each row in the order fired.
+        self.bullet_count = np.zeros(n, dtype=np.int64)
+        self.bullet_x = np.zeros((n, bullets), dtype=np.int64)
+        self.bullet_y = np.zeros((n, bullets))
+        self.bullet_rect_y = np.zeros((n, bullets), dtype=np.int64)
+
+        # The fleet, moving as anchor + moves * step the way Fleet does.
+        self.alive = np.zeros((n, self.slots), dtype=bool)
+        self.alien_count = np.zeros(n, dtype=np.int64)
+        self.anchor_x = np.zeros(n)
+        self.moves = np.zeros(n, dtype=np.int64)
+        self.step_x = np.zeros(n)
+        self.offset_y = np.zeros(n, dtype=np.int64)
+        self.left = np.zeros(n, dtype=np.int64)
+        self.right = np.zeros(n, dtype=np.int64)
+        self.bottom = np.zeros(n, dtype=np.int64)
+
+    def reset(self, seed=None):
+        """Start every game afresh; return the observations and an info dict."""
+        self._start(np.ones(self.num_envs, dtype=bool))
+        return self._observe(), self._info()
+
+    def step(self, actions):
+        """Play one tick of every game; return batched observations, rewards and flags.
+
+        actions holds one action index per game. Games that terminate or are
+        truncated are started again before the observations are taken; their
+        final stats are in info['final_score'] and info['final_level'].
+        """
+        actions = np.asarray(actions)
+        left = (actions == 1) | (actions == 4)
+        right = (actions == 2) | (actions == 5)
+        fire = actions >= 3
+        score = self.score.copy()
+
+        # Paused games hold still for the tick, as if they weren't active.
+        paused = self.pause_ticks > 0
+        self.pause_ticks[paused] -= 1
+        active = self.active
+        self.active = active & ~paused
+
+        self._fire_bullets(fire & ~paused)
+        self._update_ship(left, right)
+        self._update_bullets()
+        self._update_aliens()
+        self.ticks += 1
+        self.active |= active & paused
+
+        reward = self.score - score
+        terminated = ~self.active
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        if self.max_ticks is not None:
+            truncated = ~terminated & (self.ticks >= self.max_ticks)
+
+        info = self._info()
+        done = terminated | truncated
+        info['final_score'] = np.where(done, self.score, 0)
+        info['final_level'] = np.where(done, self.level, 0)
+        if done.any():
+            self._start(done)
+        return self._observe(), reward, terminated, truncated, info
+
+    def _info(self):
+        return {'score': self.score.copy(), 'level': self.level.copy(),
+                'ships_left': self.ships_left.copy()}
+
+    def _start(self, games):
+        """Start new games where games is True, as _start_game() does."""
+        for name, value in self.initial.items():
+            getattr(self, name)[games] = value
+        self.ships_left[games] = self.settings.ship_limit
+        self.score[games] = 0
+        self.level[games] = 1
+        self.active[games] = True
+        self.ticks[games] = 0
+        self.pause_ticks[games] = 0
+        self.bullet_count[games] = 0
+        self._create_fleets(games)
+        self._center_ships(games)
+
+    def _center_ships(self, games):
+        ship_width = self.ship_size[0]
+        self.ship_rect_x[games] = self.settings.screen_width // 2 - ship_width // 2
+        self.ship_x[games] = self.ship_rect_x[games]
+
+    def _create_fleets(self, games):
+        """Replace the fleets of games with fresh copies of the formation."""
+        self.alive[games] = True
+        self.alien_count[games] = self.slots
+        self.anchor_x[games] = 0.0
+        self.moves[games] = 0
+        self.step_x[games] = self.alien_speed[games] * self.fleet_direction[games]
+        self.offset_y[games] = 0
+        if self.slots:
+            self.left[games] = self.slot_x.min()
+            self.right[games] = self.slot_x.max() + self.alien_size[0]
+            self.bottom[games] = self.slot_y.max() + self.alien_size[1]
+
+    def _fire_bullets(self, fire):
+        """Fire a bullet from each ship whose game fires and has one to spare."""
+        games = np.flatnonzero(fire & (self.bullet_count < self.settings.bullets_allowed))
+        if not len(games):
+            return
+        slots = self.bullet_count[games]
+        ship_center = self.ship_rect_x[games] + self.ship_size[0] // 2
+        self.bullet_x[games, slots] = ship_center - self.settings.bullet_width // 2
+        self.bullet_y[games, slots] = self.ship_top
+        self.bullet_rect_y[games, slots] = self.ship_top
+        self.bullet_count[games] += 1
+
+    def _update_ship(self, left, right):
+        right_room = self.ship_rect_x + self.ship_size[0] < self.settings.screen_width
+        left_room = self.ship_rect_x > 0
+        self.ship_x += np.where(right & right_room & self.active, self.ship_speed, 0.0)
+        self.ship_x -= np.where(left & left_room & self.active, self.ship_speed, 0.0)
+        self.ship_rect_x = _round_rect(self.ship_x)
+
+    def _update_bullets(self):
+        in_flight = self._in_flight()
+        self.bullet_y -= np.where(in_flight, self.bullet_speed[:, None], 0.0)
+        self.bullet_rect_y = _round_rect(self.bullet_y)
+        self._keep_bullets(in_flight & (self.bullet_rect_y + self.settings.bullet_height > 0))
+
+        # A game whose fleet is already gone gets a new one.
+        empty = self.active & (self.alien_count == 0)
+        self.bullet_count[empty] = 0
+        self._create_fleets(empty)
+
+        self._check_bullet_alien_collisions()
+
+    def _check_bullet_alien_collisions(self):
+        """Remove bullets and the aliens they hit, and score the hits."""
+        in_flight = self._in_flight()
+        if in_flight.any():
+            alien_x, alien_y = self._alien_positions()
+            width, height = self.alien_size
+            bullet_x, bullet_y = self.bullet_x[:, :, None], self.bullet_rect_y[:, :, None]
+            overlap = (in_flight[:, :, None] & self.alive[:, None, :]
+                       & (bullet_x < (alien_x + width)[:, None, :])
+                       & (bullet_x + self.settings.bullet_width > alien_x[:, None, :])
+                       & (bullet_y < (alien_y + height)[:, None, :])
+                       & (bullet_y + self.settings.bullet_height > alien_y[:, None, :]))
+
+            # Bullets are checked in the order they were fired, so each alien
+            #   is destroyed by the first bullet touching it, and a bullet is
+            #   spent only if it destroyed something.
+            killed = overlap.any(axis=1)
+            games, slots = np.nonzero(killed)
+            spent = np.zeros(in_flight.shape, dtype=bool)
+            spent[games, overlap[games, :, slots].argmax(axis=1)] = True
+
+            hits = killed.sum(axis=1)
+            self.alive &= ~killed
+            self.alien_count -= hits
+            self.score += self.alien_points * hits
+            self._keep_bullets(in_flight & ~spent)
+            self._update_bounds(hits > 0)
+
+        self._level_up(self.active & (self.alien_count == 0))
+
+    def _level_up(self, games):
+        if not games.any():
+            return
+        self.bullet_count[games] = 0
+        self._create_fleets(games)
+        scale = self.settings.speedup_scale
+        self.ship_speed[games] *= scale
+        self.bullet_speed[games] *= scale
+        self.alien_speed[games] *= scale
+        self.alien_points[games] = (self.alien_points[games] * self.settings.score_scale).astype(np.int64)
+        self.level[games] += 1
+
+    def _update_aliens(self):
+        # Start counting moves afresh where the speed or direction changed.
+        step = self.alien_speed * self.fleet_direction
+        changed = self.active & (step != self.step_x)
+        self.anchor_x = np.where(changed, self._offset_x(), self.anchor_x)
+        self.moves[changed] = 0
+        self.step_x = np.where(self.active, step, self.step_x)
+        self.moves += self.active
+
+        # Look for alien-ship collisions.
+        alien_x, alien_y = self._alien_positions()
+        width, height = self.alien_size
+        ship_x, ship_width, ship_height = self.ship_rect_x[:, None], *self.ship_size
+        touching = (self.alive
+                    & (alien_x < ship_x + ship_width) & (alien_x + width > ship_x)
+                    & (alien_y < self.ship_top + ship_height) & (alien_y + height > self.ship_top))
+        self._ship_hit(self.active & touching.any(axis=1))
+
+        # Look for aliens hitting the bottom of the screen.
+        reached = self.bottom + self.offset_y >= self.settings.screen_height
+        self._ship_hit(self.active & (self.alien_count > 0) & reached)
+
+        # Drop the fleets at an edge and change their direction.
+        shift = np.floor(self._offset_x() + 0.5)
+        at_edge = ((self.right + shift >= self.settings.screen_width)
+                   | (self.left + shift <= 0))
+        edge = self.active & (self.alien_count > 0) & at_edge
+        self.offset_y[edge] += self.settings.fleet_drop_speed
+        self.fleet_direction[edge] *= -1
+
+    def _ship_hit(self, games):
+        """Respond to the ships of games being hit, as _ship_hit() does."""
+        if not games.any():
+            return
+        spare = games & (self.ships_left > 0)
+        self.ships_left[spare] -= 1
+        self.bullet_count[spare] = 0
+        self._create_fleets(spare)
+        self._center_ships(spare)
+        self.pause_ticks[spare] = self.pause_length
+        self.active[games & ~spare] = False
+
+    def _offset_x(self):
+        return self.anchor_x + self.moves * self.step_x
+
+    def _alien_positions(self):
+        """Return the rect x and y of every slot in every game."""
+        shift = np.floor(self._offset_x() + 0.5).astype(np.int64)
+        return (self.slot_x[None, :] + shift[:, None],
+                self.slot_y[None, :] + self.offset_y[:, None])
+
+    def _in_flight(self):
+        return np.arange(self.bullet_x.shape[1])[None, :] < self.bullet_count[:, None]
+
+    def _keep_bullets(self, keep):
+        """Keep the bullets where keep is True, packed to the front in order."""
+        order = np.argsort(~keep, axis=1, kind='stable')
+        self.bullet_x = np.take_along_axis(self.bullet_x, order, axis=1)
+        self.bullet_y = np.take_along_axis(self.bullet_y, order, axis=1)
+        self.bullet_rect_y = np.take_along_axis(self.bullet_rect_y, order, axis=1)
+        self.bullet_count = keep.sum(axis=1)
+
+    def _update_bounds(self, games):
+        """Work out the bounding boxes of the live aliens where games is True."""
+        games = games & (self.alien_count > 0)
+        if not games.any():
+            return
+        alive = self.alive[games]
+        big = np.iinfo(np.int64).max
+        self.left[games] = np.where(alive, self.slot_x, big).min(axis=1)
+        self.right[games] = np.where(alive, self.slot_x, -big).max(axis=1) + self.alien_size[0]
+        self.bottom[games] = np.where(alive, self.slot_y, -big).max(axis=1) + self.alien_size[1]
+
+    def _observe(self):
+        """Return the observations of every game as one array."""
+        if self.observation == 'features':
+            shift = np.floor(self._offset_x() + 0.5)
+            depth = np.where(self.alien_count > 0, self.bottom + self.offset_y, 0)
+            return observe_features(
+                self.settings, self.ship_rect_x, self.ship_size[0], shift, self.offset_y,
+                self.fleet_direction, depth, self.bullet_count, self.ships_left, self.alive)
+        return observe_pixels(
+            self.settings, self.pixel_scale, self.ship_rect_x, self.ship_top, self.ship_size,
+            self.bullet_x, self.bullet_rect_y, self._in_flight(),
+            self.slot_x, self.slot_y, self.alien_size,
+            np.floor(self._offset_x() + 0.5).astype(np.int64), self.offset_y, self.alive)
+
+def observe_features(settings, ship_x, ship_width, fleet_x, fleet_y, fleet_direction,
+                     fleet_depth, bullets, ships_left, alive):
+    """Return one row of features per game, named by FEATURE_NAMES then one per slot."""
+    width, height = settings.screen_width, settings.screen_height
+    columns = [
+        (ship_x + ship_width / 2) / width,
+        fleet_x / width,
+        fleet_y / height,
+        fleet_direction,
+        fleet_depth / height,
+        bullets / max(settings.bullets_allowed, 1),
+        ships_left / max(settings.ship_limit, 1),
+    ]
+    features = np.empty((len(alive), len(columns) + alive.shape[1]), dtype=np.float32)
+    for index, column in enumerate(columns):
+        features[:, index] = column
+    features[:, len(columns):] = alive
+    return features
+
+def observe_pixels(settings, scale, ship_x, ship_top, ship_size, bullet_x, bullet_y, in_flight,
+                   slot_x, slot_y, alien_size, fleet_x, fleet_y, alive):
+    """Return one picture per game, shrunk by scale, with each object in its own shade.
+
+    A cell is lit if any part of an object covers it, so small bullets are
+    never lost to the downsampling.
+    """
+    shape = (len(alive), settings.screen_height // scale, settings.screen_width // scale)
+    alien_x = slot_x[None, :] + np.asarray(fleet_x)[:, None]
+    alien_y = slot_y[None, :] + np.asarray(fleet_y)[:, None]
+    ship_y = np.full(ship_x.shape, ship_top)
+
+    frame = np.zeros(shape, dtype=np.uint8)
+    layers = (
+        (SHIP_PIXEL, ship_x[:, None], ship_y[:, None], ship_size, np.ones((len(alive), 1), bool)),
+        (ALIEN_PIXEL, alien_x, alien_y, alien_size, alive),
+        (BULLET_PIXEL, bullet_x, bullet_y, (settings.bullet_width, settings.bullet_height),
+         in_flight),
+    )
+    for value, xs, ys, size, mask in layers:
+        covered = _cover(shape, scale, xs, ys, size, mask)
+        frame[covered] = value
+    return frame
+
+def _cover(shape, scale, xs, ys, size, mask):
+    """Return which cells of shape are covered by boxes of size at xs, ys where mask is True.
+
+    Each box adds its corners to a difference array, so the cost doesn't
+    depend on how big the boxes are.
+    """
+    games, rows, cols = shape
+    width, height = size
+    col0 = np.clip(xs // scale, 0, cols)
+    col1 = np.clip((xs + width - 1) // scale + 1, 0, cols)
+    row0 = np.clip(ys // scale, 0, rows)
+    row1 = np.clip((ys + height - 1) // scale + 1, 0, rows)
+    mask = mask & (col0 < col1) & (row0 < row1)
+
+    game = np.broadcast_to(np.arange(games)[:, None], mask.shape)[mask]
+    col0, col1, row0, row1 = col0[mask], col1[mask], row0[mask], row1[mask]
+    corners = np.concatenate([np.ravel_multi_index((game, row, col), (games, rows + 1, cols + 1))
+                              for row, col in ((row0, col0), (row0, col1),
+                                               (row1, col0), (row1, col1))])
+    weights = np.repeat(np.array([1, -1, -1, 1]), len(game))
+    diff = np.bincount(corners, weights, games * (rows + 1) * (cols + 1))
+    diff = diff.reshape(games, rows + 1, cols + 1)
+    return diff.cumsum(axis=1).cumsum(axis=2)[:, :rows, :cols] > 0
+
+def _round_rect(values):
+    """Round values to ints the way pygame does when assigning to a Rect."""
+    return (np.sign(values) * np.floor(np.abs(values) + 0.5)).astype(np.int64)
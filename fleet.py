@@ -0,0 +1,394 @@
+from math import ceil, floor
+
+import numpy as np
+import pygame
+
+from alien import Alien
+from collision import SpatialHash
+from fleet_layer import FleetLayer
+from formations import get_layout
+
+class Fleet:
+    """A class to manage the whole fleet of aliens as one block that moves together.
+
+    Each alien only keeps its place in the formation (its slot) and whether it
+    is alive. The fleet's position is one shared offset, so moving the fleet,
+    finding its edges and predicting its next bounce are O(1) per tick;
+    per-alien work only happens when aliens are hit or drawn.
+    """
+
+    def __init__(self, ai_game):
+        """Initialize an empty fleet."""
+        self.ai_game = ai_game
+        self.screen = ai_game.screen
+        self.settings = ai_game.settings
+        self.screen_rect = self.screen.get_rect()
+
+        # Every alien shares one image, so the fleet only keeps its size.
+        self.image = ai_game.assets.load_image('images/alien.bmp')
+        self.width, self.height = self.image.get_size()
+
+        # One slot per alien: its position in the formation and whether it has
+        #   been shot down yet. These are views of storage that is kept and
+        #   reused from one fleet to the next.
+        self.capacity = None
+        self._reserve(0)
+        self.count = 0
+
+        # The horizontal offset is anchor_x + moves * step, counted from the
+        #   last change of speed or direction, so that predictions and the
+        #   actual movement always come out the same.
+        self.anchor_x = 0.0
+        self.moves = 0
+        self.step = 0.0
+        self.offset_y = 0
+        # The horizontal offset before the last update, for drawing between ticks.
+        self.previous_x = 0.0
+
+        # Bounding box of the live aliens, in formation coordinates.
+        self.left = self.right = self.top = self.bottom = 0
+
+        # Collision queries only look at the aliens in the grid cells they touch.
+        #   A cell is as big as one alien plus the gap to its neighbour.
+        self.grid = SpatialHash(2 * self.width, 2 * self.height)
+
+        # Alien views handed out by sprites(), one per slot and reused.
+        self._views = []
+
+        # Every live alien drawn onto one surface, to be blitted whole.
+        self.layer = FleetLayer(self.image)
+        # Counts the fleets spawned, so copies of the fleet can tell a new one
+        #   from the old one with some aliens shot down.
+        self.generation = 0
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    def __iter__(self):
+        return iter(self.sprites())
+
+    @property
+    def layer_version(self):
+        """A number that changes whenever the fleet layer does."""
+        return self.layer.version
+
+    @property
+    def offset_x(self):
+        """The exact horizontal distance the fleet has moved since it spawned."""
+        return self.anchor_x + self.moves * self.step
+
+    @property
+    def shift_x(self):
+        """The horizontal distance moved, rounded to whole pixels."""
+        return floor(self.offset_x + 0.5)
+
+    @property
+    def rect_x(self):
+        """A new array of every slot's rect x position."""
+        return self.slot_x + self.shift_x
+
+    @property
+    def rect_y(self):
+        """A new array of every slot's rect y position."""
+        return self.slot_y + self.offset_y
+
+    def spawn_layout(self, layout):
+        """Replace the fleet with a precomputed layout from formations.get_layout().
+
+        The positions are bulk copied and the layout's grid is shared, so no
+        per-alien Python work is done.
+        """
+        self._reserve(len(layout))
+        self.slot_x[:] = layout.slot_x
+        self.slot_y[:] = layout.slot_y
+        self.alive[:] = True
+        self.count = len(layout)
+
+        self.anchor_x = 0.0
+        self.moves = 0
+        self.step = self._current_step()
+        self.offset_y = 0
+        self.previous_x = 0.0
+
+        self._update_bounds()
+        self.grid.share(layout.grid)
+        self._invalidate_layer()
+
+    def restore(self, slot_x, slot_y, alive, anchor_x, moves, step, offset_y):
+        """Put the fleet back in a state saved from its attributes."""
+        self._reserve(len(slot_x))
+        self.slot_x[:] = slot_x
+        self.slot_y[:] = slot_y
+        self.alive[:] = alive
+        self.count = int(self.alive.sum())
+
+        self.anchor_x = anchor_x
+        self.moves = moves
+        self.step = step
+        self.offset_y = offset_y
+        self.previous_x = self.offset_x
+        self._update_bounds()
+
+        # Fleets are nearly always copies of the current layout, whose grid can
+        #   be shared; anything else is hashed again.
+        layout = get_layout(self.settings.fleet_formation,
+                            self.settings.screen_width, self.settings.screen_height,
+                            self.width, self.height)
+        if np.array_equal(layout.slot_x, self.slot_x) and np.array_equal(layout.slot_y, self.slot_y):
+            self.grid.share(layout.grid)
+        else:
+            self.grid.build(self.slot_x, self.slot_y, self.width, self.height)
+        self.grid.count = self.count
+        self.grid.move_to(self.offset_x, self.offset_y)
+        self._invalidate_layer()
+
+    def empty(self):
+        """Remove every alien from the fleet."""
+        self.alive[:] = False
+        self.count = 0
+        self.grid.build(self.slot_x[:0], self.slot_y[:0], self.width, self.height)
+        self._invalidate_layer()
+
+    def update(self):
+        """Move the fleet sideways in its current direction."""
+        self.previous_x = self.offset_x
+        self._follow_settings()
+        self.moves += 1
+        self.grid.move_to(self.offset_x, self.offset_y)
+
+    def check_edges(self):
+        """Return True if any alien is at an edge of the screen."""
+        return self.count > 0 and self._at_edge(self.shift_x)
+
+    def drop(self, distance):
+        """Move the entire fleet down by distance pixels."""
+        self.offset_y += distance
+        self.grid.move_to(self.offset_x, self.offset_y)
+
+    def reached_bottom(self, bottom):
+        """Return True if any alien has reached the given y position."""
+        return self.count > 0 and self.bottom + self.offset_y >= bottom
+
+    def collide_rect(self, rect):
+        """Return True if any alien overlaps rect."""
+        if not self._bounds_overlap(rect):
+            return False
+        return len(self._overlapping(rect)) > 0
+
+    def collide_bullets(self, bullets):
+        """Remove bullets and the aliens they hit; return the number of aliens hit."""
+        aliens_hit = 0
+        spent = []
+        for bullet in bullets:
+            if not self._bounds_overlap(bullet.rect):
+                continue
+            hit = self._overlapping(bullet.rect)
+            if len(hit):
+                # Like groupcollide(), a bullet destroys every alien it touches.
+                spent.append(bullet)
+                self.alive[hit] = False
+                self.grid.remove(hit.tolist())
+                self.count -= len(hit)
+                aliens_hit += len(hit)
+                self.layer.erase(self.slot_x, self.slot_y, hit)
+
+        if spent:
+            bullets.release(spent)
+            self._update_bounds()
+        return aliens_hit
+
+    def ticks_until_edge(self):
+        """Return how many more updates until check_edges() is True, or None."""
+        if not self.count:
+            return None
+        return self._ticks_until_edge(*self._motion())
+
+    def ticks_until_depth(self, y):
+        """Return how many more ticks until the bottom of the fleet reaches y, or None.
+
+        A tick is one update(), then a drop and a change of direction if the
+        fleet is at an edge, the way the game plays it. The answer counts the
+        tick whose checks first see the fleet at y.
+        """
+        if not self.count:
+            return None
+        depth = self.bottom + self.offset_y
+        if depth >= y:
+            return 0
+        drop = self.settings.fleet_drop_speed
+        if drop <= 0:
+            return None
+
+        # Only bounces move the fleet down, so walk from one bounce to the next.
+        anchor_x, moves, step = self._motion()
+        ticks = 0
+        for _ in range(ceil((y - depth) / drop)):
+            wait = self._ticks_until_edge(anchor_x, moves, step)
+            if wait is None:
+                return None
+            ticks += wait
+            anchor_x, moves, step = anchor_x + (moves + wait) * step, 0, -step
+        # The last drop comes at the end of its tick and is seen on the next one.
+        return ticks + 1
+
+    def advance(self, ticks, on_edge):
+        """Move the fleet ticks times without stepping through each tick.
+
+        on_edge() is called at every bounce and is expected to drop the fleet
+        and reverse its direction, as _change_fleet_direction() does.
+        """
+        while ticks > 0:
+            self._follow_settings()
+            wait = self.ticks_until_edge()
+            if wait is None or wait > ticks:
+                self.moves += ticks
+                break
+            self.moves += wait
+            ticks -= wait
+            on_edge()
+        self.grid.move_to(self.offset_x, self.offset_y)
+        self.previous_x = self.offset_x
+
+    def draw_shift(self, alpha=1.0):
+        """Return the horizontal distance moved, alpha of the way through the last update."""
+        if alpha >= 1.0:
+            return self.shift_x
+        previous_x = self.previous_x
+        return floor(previous_x + (self.offset_x - previous_x) * alpha + 0.5)
+
+    def sprites(self):
+        """Return a list of Alien views placed at the live aliens' positions."""
+        while len(self._views) < len(self.slot_x):
+            self._views.append(Alien(self.ai_game))
+
+        offset_x, shift_x = self.offset_x, self.shift_x
+        sprites = []
+        for index in np.flatnonzero(self.alive).tolist():
+            alien = self._views[index]
+            alien.x = int(self.slot_x[index]) + offset_x
+            alien.rect.x = int(self.slot_x[index]) + shift_x
+            alien.rect.y = int(self.slot_y[index]) + self.offset_y
+            sprites.append(alien)
+        return sprites
+
+    def layer_rect(self, alpha=1.0):
+        """Return where the fleet layer is drawn, alpha of the way through the last update."""
+        layer = self.get_layer()
+        x, y = self.layer.origin
+        return pygame.Rect(x + self.draw_shift(alpha), y + self.offset_y, *layer.get_size())
+
+    def get_layer(self):
+        """Return the surface with every live alien on it, drawing it if needed."""
+        return self.layer.get_surface(self.slot_x, self.slot_y, self.alive)
+
+    def draw(self, surface, alpha=1.0):
+        """Draw every live alien to surface with a single blit."""
+        if self.count:
+            surface.blit(self.get_layer(), self.layer_rect(alpha))
+
+    def _current_step(self):
+        """Return how far one update moves the fleet with the current settings."""
+        return self.settings.alien_speed * self.settings.fleet_direction
+
+    def _motion(self):
+        """Return the anchor, moves and step the next update() will continue from."""
+        step = self._current_step()
+        if step != self.step:
+            return self.offset_x, 0, step
+        return self.anchor_x, self.moves, step
+
+    def _follow_settings(self):
+        """Start counting moves afresh if the speed or direction has changed."""
+        step = self._current_step()
+        if step != self.step:
+            self.anchor_x = self.offset_x
+            self.moves = 0
+            self.step = step
+
+    def _at_edge(self, shift_x):
+        """Return True if the live aliens touch an edge when shifted by shift_x."""
+        return (self.right + shift_x >= self.screen_rect.right) or (self.left + shift_x <= 0)
+
+    def _ticks_until_edge(self, anchor_x, moves, step):
+        """Return the fewest further moves, at least one, that put the fleet at an edge."""
+        if step == 0:
+            return None
+
+        def at_edge(extra):
+            # The same arithmetic as offset_x, so the answer is exact.
+            return self._at_edge(floor(anchor_x + (moves + extra) * step + 0.5))
+
+        # A slow fleet can still be at the edge it just bounced off.
+        if at_edge(1):
+            return 1
+
+        # Solve floor(offset + 0.5) against the edge ahead, then settle any
+        #   floating point rounding by checking the moves around the estimate.
+        offset_x = anchor_x + moves * step
+        if step > 0:
+            estimate = ceil((self.screen_rect.right - self.right - 0.5 - offset_x) / step)
+        else:
+            estimate = ceil((-self.left + 0.5 - offset_x) / step)
+        estimate = max(estimate, 2)
+        while estimate > 2 and at_edge(estimate - 1):
+            estimate -= 1
+        while not at_edge(estimate):
+            estimate += 1
+        return estimate
+
+    def _invalidate_layer(self):
+        """Count a new fleet, and draw the layer afresh the next time it is needed."""
+        self.generation += 1
+        self.layer.invalidate()
+
+    def _update_bounds(self):
+        """Work out the bounding box of the live aliens."""
+        if not self.count:
+            return
+        alive = self.alive
+        self.left = int(self.slot_x[alive].min())
+        self.right = int(self.slot_x[alive].max()) + self.width
+        self.top = int(self.slot_y[alive].min())
+        self.bottom = int(self.slot_y[alive].max()) + self.height
+
+    def _bounds_overlap(self, rect):
+        """Return True if rect overlaps the bounding box of the live aliens."""
+        if not self.count:
+            return False
+        shift_x = self.shift_x
+        return (self.left + shift_x < rect.right and rect.left < self.right + shift_x
+                and self.top + self.offset_y < rect.bottom
+                and rect.top < self.bottom + self.offset_y)
+
+    def _reserve(self, size):
+        """Make the slot arrays size long, growing their storage only if needed."""
+        if self.capacity is None or size > self.capacity:
+            self.capacity = size
+            self._slot_x = np.zeros(size, dtype=np.int64)
+            self._slot_y = np.zeros(size, dtype=np.int64)
+            self._alive = np.zeros(size, dtype=bool)
+
+        self.slot_x = self._slot_x[:size]
+        self.slot_y = self._slot_y[:size]
+        self.alive = self._alive[:size]
+
+    def _overlapping(self, rect):
+        """Return the indices of the live aliens that overlap rect."""
+        candidates = self.grid.query(rect)
+        if candidates is None:
+            candidates = np.flatnonzero(self.alive)
+        else:
+            # The grid still lists aliens that have been shot down.
+            candidates = candidates[self.alive[candidates]]
+        if not len(candidates):
+            return candidates
+
+        # The grid only narrows the search; test the candidates exactly.
+        rect_x = self.slot_x[candidates] + self.shift_x
+        rect_y = self.slot_y[candidates] + self.offset_y
+        overlap = ((rect_x < rect.right) & (rect_x + self.width > rect.left)
+                   & (rect_y < rect.bottom) & (rect_y + self.height > rect.top))
+        return candidates[overlap]
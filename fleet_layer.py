@@ -0,0 +1,69 @@
+import pygame
+
+class FleetLayer:
+    """A class to keep every live alien of a fleet drawn on one surface.
+
+    The layer is blitted whole each frame. Aliens that are shot down are
+    erased from it in place; it is only drawn again for a new fleet.
+    """
+
+    def __init__(self, image):
+        """Initialize a layer for aliens that look like image; nothing is drawn yet."""
+        self.image = image
+        self.width, self.height = image.get_size()
+        self.key = _free_color(image)
+
+        # The surface, where its top left corner sits in formation
+        #   coordinates, and a version that changes whenever the surface does.
+        self.surface = None
+        self.origin = (0, 0)
+        self.version = 0
+
+    def invalidate(self):
+        """Draw the layer afresh the next time it is needed."""
+        self.surface = None
+        self.version += 1
+
+    def get_surface(self, slot_x, slot_y, alive):
+        """Return the surface with the live aliens on it, drawing it if needed."""
+        if self.surface is None:
+            self._draw(slot_x, slot_y, alive)
+        return self.surface
+
+    def erase(self, slot_x, slot_y, indices):
+        """Clear the aliens in the given slots off the layer, if it has been drawn."""
+        if self.surface is None:
+            return
+        # Aliens in a formation never overlap, so this leaves the others whole.
+        left, top = self.origin
+        for index in indices.tolist():
+            self.surface.fill(self.key, (int(slot_x[index]) - left, int(slot_y[index]) - top,
+                                         self.width, self.height))
+        self.version += 1
+
+    def _draw(self, slot_x, slot_y, alive):
+        """Draw the live aliens onto a new surface that just covers them."""
+        xs, ys = slot_x[alive], slot_y[alive]
+        if len(xs):
+            left, top = int(xs.min()), int(ys.min())
+            size = (int(xs.max()) + self.width - left, int(ys.max()) + self.height - top)
+        else:
+            left = top = 0
+            size = (0, 0)
+
+        # The surface has the image's pixel format, so blitting it costs no
+        #   conversion; the gaps between aliens are see-through.
+        self.surface = pygame.Surface(size, 0, self.image)
+        self.surface.fill(self.key)
+        self.surface.set_colorkey(self.key)
+        positions = zip((xs - left).tolist(), (ys - top).tolist())
+        self.surface.blits([(self.image, position) for position in positions], doreturn=False)
+        self.origin = (left, top)
+
+def _free_color(image):
+    """Return a color that no pixel of image has, to use as a color key."""
+    for red in range(255, -1, -1):
+        color = (red, 0, 255)
+        if not pygame.mask.from_threshold(image, color, (1, 1, 1, 255)).count():
+            return color
+    raise ValueError("the image uses every color tried as a color key")
@@ -0,0 +1,127 @@
+from functools import lru_cache
+
+import numpy as np
+
+from collision import SpatialHash
+
+def grid_formation(screen_width, screen_height, alien_width, alien_height):
+    """Return the x and y positions of the classic rows of aliens."""
+    # Create an alien and keep adding aliens until there's no room left.
+    # Spacing between aliens is one alien width and one alien height.
+    positions_x, positions_y = [], []
+
+    current_x, current_y = alien_width, alien_height
+    while current_y < (screen_height - (3 * alien_height)):
+        while current_x < (screen_width - (2 * alien_width)):
+            positions_x.append(current_x)
+            positions_y.append(current_y)
+            current_x += 2 * alien_width
+
+        # Finished a row; reset x value and increment y value
+        current_x = alien_width
+        current_y += 2 * alien_height
+
+    return positions_x, positions_y
+
+def staggered_formation(screen_width, screen_height, alien_width, alien_height):
+    """Return the positions of rows where every other row is shifted by one alien."""
+    positions_x, positions_y = grid_formation(screen_width, screen_height,
+                                              alien_width, alien_height)
+    rows = sorted(set(positions_y))
+    shifted = set(rows[1::2])
+
+    staggered_x, staggered_y = [], []
+    for x, y in zip(positions_x, positions_y):
+        if y in shifted:
+            x += alien_width
+            # The shifted row loses its last alien if it would run off the screen.
+            if x >= screen_width - (2 * alien_width):
+                continue
+        staggered_x.append(x)
+        staggered_y.append(y)
+    return staggered_x, staggered_y
+
+def diamond_formation(screen_width, screen_height, alien_width, alien_height):
+    """Return the positions of the grid trimmed to a diamond around its centre."""
+    positions_x, positions_y = grid_formation(screen_width, screen_height,
+                                              alien_width, alien_height)
+    if not positions_x:
+        return positions_x, positions_y
+
+    # Measure in grid steps, so the diamond fits whatever the grid's shape.
+    columns = [(x - alien_width) // (2 * alien_width) for x in positions_x]
+    rows = [(y - alien_height) // (2 * alien_height) for y in positions_y]
+    mid_col, mid_row = max(columns) / 2, max(rows) / 2
+    radius = max(mid_col, mid_row)
+
+    diamond_x, diamond_y = [], []
+    for x, y, col, row in zip(positions_x, positions_y, columns, rows):
+        if abs(col - mid_col) / max(mid_col, 1) + abs(row - mid_row) / max(mid_row, 1) <= 1:
+            diamond_x.append(x)
+            diamond_y.append(y)
+    return diamond_x, diamond_y
+
+def mask_formation(mask):
+    """Return a formation that places aliens where mask has an 'X'.
+
+    mask is a list of strings, one per row, like ['X.X.X', '.XXX.']. Rows
+    and columns beyond what fits on the screen are dropped.
+    """
+    mask = tuple(mask)
+
+    def formation(screen_width, screen_height, alien_width, alien_height):
+        positions_x, positions_y = [], []
+        for row, line in enumerate(mask):
+            y = alien_height + row * 2 * alien_height
+            if y >= screen_height - (3 * alien_height):
+                break
+            for col, char in enumerate(line):
+                x = alien_width + col * 2 * alien_width
+                if x >= screen_width - (2 * alien_width):
+                    break
+                if char == 'X':
+                    positions_x.append(x)
+                    positions_y.append(y)
+        return positions_x, positions_y
+
+    return formation
+
+# Formations that settings.fleet_formation can name.
+FORMATIONS = {
+    'grid': grid_formation,
+    'staggered': staggered_formation,
+    'diamond': diamond_formation,
+}
+
+def register_formation(name, generator):
+    """Make a new formation available under name, replacing any with that name."""
+    FORMATIONS[name] = generator
+    get_layout.cache_clear()
+
+class FleetLayout:
+    """A class to hold one formation's slot positions and grid, shared by every fleet."""
+
+    def __init__(self, positions_x, positions_y, alien_width, alien_height):
+        """Store the positions as read-only arrays and hash them once."""
+        self.slot_x = np.array(positions_x, dtype=np.int64)
+        self.slot_y = np.array(positions_y, dtype=np.int64)
+        self.slot_x.flags.writeable = False
+        self.slot_y.flags.writeable = False
+
+        # The fleet's grid uses cells of one alien plus the gap to its neighbour.
+        self.grid = SpatialHash(2 * alien_width, 2 * alien_height)
+        self.grid.build(self.slot_x, self.slot_y, alien_width, alien_height)
+
+    def __len__(self):
+        return len(self.slot_x)
+
+@lru_cache(maxsize=32)
+def get_layout(formation, screen_width, screen_height, alien_width, alien_height):
+    """Return the layout of the named formation, generating it only the first time."""
+    try:
+        generator = FORMATIONS[formation]
+    except KeyError:
+        raise ValueError(f"unknown fleet formation: {formation!r}") from None
+    positions_x, positions_y = generator(screen_width, screen_height,
+                                         alien_width, alien_height)
+    return FleetLayout(positions_x, positions_y, alien_width, alien_height)
@@ -0,0 +1,37 @@
+class InputState:
+    """A class to hold the player's input for a single tick of the game."""
+
+    def __init__(self, left=False, right=False, fire=False, start=False):
+        """Initialize the input; left and right are held, fire and start are presses."""
+        self.left = left
+        self.right = right
+        self.fire = fire
+        self.start = start
+
+    @classmethod
+    def from_bits(cls, bits):
+        """Return the input packed into bits by to_bits()."""
+        return cls(left=bool(bits & 1), right=bool(bits & 2),
+                   fire=bool(bits & 4), start=bool(bits & 8))
+
+    def to_bits(self):
+        """Return the input packed into the low four bits of an int."""
+        return self.left | (self.right << 1) | (self.fire << 2) | (self.start << 3)
+
+    def copy(self):
+        """Return a separate InputState holding the same input."""
+        return InputState(self.left, self.right, self.fire, self.start)
+
+    def clear_presses(self):
+        """Forget the one-off presses once a tick has used them."""
+        self.fire = False
+        self.start = False
+
+    def __eq__(self, other):
+        return (isinstance(other, InputState)
+                and (self.left, self.right, self.fire, self.start)
+                == (other.left, other.right, other.fire, other.start))
+
+    def __repr__(self):
+        return (f"InputState(left={self.left}, right={self.right}, "
+                f"fire={self.fire}, start={self.start})")
@@ -0,0 +1,110 @@
+from collections import deque
+
+# Quality levels from best to cheapest. Each level keeps the savings of the
+#   ones before it:
+#   hud       the score is rendered a few times a second instead of on every change
+#   fleet     the fleet is moved on screen every other frame (dirty rendering only)
+#   frames    every other frame is drawn; input and logic still run every frame
+#   catch_up  at most one tick runs per frame, so the game slows down rather
+#             than making late frames later still
+LEVELS = ('full', 'hud', 'fleet', 'frames', 'catch_up')
+
+class LoadGovernor:
+    """A class to trade drawing quality for frame time when frames run late.
+
+    The game logic runs in fixed ticks and is never changed, so replays and
+    snapshots stay exact; only how much is drawn, and how far a late frame
+    tries to catch up, goes down a level at a time.
+    """
+
+    def __init__(self, ai_game, window=30, overload=0.25, headroom=0.6,
+                 recovery_frames=120, hud_interval=10, history=100):
+        """Initialize the governor at full quality.
+
+        Quality goes down a level once overload of the last window frames
+        have missed the frame budget, and back up a level once
+        recovery_frames frames in a row have used less than headroom of it.
+        """
+        self.ai_game = ai_game
+        settings = ai_game.settings
+        self.budget = 1 / (settings.target_fps or settings.logic_rate)
+        self.window = window
+        self.overload = overload
+        self.headroom = headroom
+        self.recovery_frames = recovery_frames
+        self.hud_interval = hud_interval
+
+        self.level = 0
+        self.frames = 0
+        # Whether each recent frame missed its budget, and the run of frames
+        #   in a row with room to spare.
+        self.recent = deque(maxlen=window)
+        self.calm_frames = 0
+        # The latest changes of level, oldest first.
+        self.decisions = deque(maxlen=history)
+
+    @property
+    def level_name(self):
+        return LEVELS[self.level]
+
+    def tick_limit(self):
+        """Return how many ticks a frame may run to catch up."""
+        if self.level >= LEVELS.index('catch_up'):
+            return 1
+        return self.ai_game.settings.max_ticks_per_frame
+
+    def draw_this_frame(self):
+        """Return False for the frames left undrawn to save time."""
+        return self.level < LEVELS.index('frames') or self.frames % 2 == 0
+
+    def end_frame(self, frame_time):
+        """Take in how long the frame's work took and change level if needed."""
+        self.frames += 1
+        late = frame_time > self.budget
+        self.recent.append(late)
+        if frame_time < self.headroom * self.budget:
+            self.calm_frames += 1
+        else:
+            self.calm_frames = 0
+
+        if (len(self.recent) == self.window and self.level < len(LEVELS) - 1
+                and sum(self.recent) >= self.overload * self.window):
+            self._set_level(self.level + 1, frame_time,
+                            f"{sum(self.recent)} of the last {self.window} frames were late")
+        elif self.level > 0 and self.calm_frames >= self.recovery_frames:
+            self._set_level(self.level - 1, frame_time,
+                            f"{self.calm_frames} frames in a row had headroom")
+
+        sb = self.ai_game.sb
+        if sb.deferring and self.frames % self.hud_interval == 0:
+            sb.flush_renders()
+
+    def metrics(self):
+        """Return the current level and the latest decisions as a dict."""
+        return {
+            'level': self.level,
+            'level_name': self.level_name,
+            'frames': self.frames,
+            'late_frames': sum(self.recent),
+            'decisions': list(self.decisions),
+        }
+
+    def _set_level(self, level, frame_time, reason):
+        """Move to level, apply what it means to the game and note why."""
+        self.decisions.append({
+            'frame': self.frames,
+            'from': LEVELS[self.level],
+            'to': LEVELS[level],
+            'frame_ms': frame_time * 1000,
+            'reason': reason,
+        })
+        self.level = level
+        self.recent.clear()
+        self.calm_frames = 0
+
+        game = self.ai_game
+        game.sb.deferring = level >= LEVELS.index('hud')
+        if not game.sb.deferring:
+            game.sb.flush_renders()
+        if game.renderer:
+            game.renderer.fleet_interval = 2 if level >= LEVELS.index('fleet') else 1
@@ -0,0 +1,180 @@
+"""Run Alien Invasion without a window, as fast as the CPU allows."""
+
+import argparse
+import os
+import random
+from time import perf_counter
+
+import pygame
+
+from alien_invasion import AlienInvasion
+from game_input import InputState
+from scoreboard import Scoreboard
+
+class HeadlessScoreboard(Scoreboard):
+    """A scoreboard that keeps the high score but never renders anything."""
+
+    def __init__(self, ai_game):
+        self.ai_game = ai_game
+        self.settings = ai_game.settings
+        self.stats = ai_game.stats
+
+    def prep_images(self):
+        pass
+
+    def prep_score(self):
+        pass
+
+    def prep_high_score(self):
+        pass
+
+    def prep_level(self):
+        pass
+
+    def prep_ships(self):
+        pass
+
+    def show_score(self):
+        pass
+
+class HeadlessGame(AlienInvasion):
+    """The game logic of Alien Invasion with no display or clock."""
+
+    def __init__(self, settings=None):
+        """Initialize the game; nothing is shown and nothing waits."""
+        super().__init__(settings)
+        # Nothing is shown, so there is no reason to put any of startup off.
+        self._continue_startup(all_of_it=True)
+
+        # Number of fixed ticks simulated so far.
+        self.ticks = 0
+
+    def _init_pygame(self):
+        # The dummy video driver is enough for the mouse calls the game makes.
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        pygame.display.init()
+
+    def _create_screen(self):
+        # An off-screen surface only gives the sprites the size of the screen.
+        return pygame.Surface((self.settings.screen_width, self.settings.screen_height))
+
+    def _create_score_store(self):
+        # Simulated games are not the player's, so they stay out of the high scores.
+        return None
+
+    def _create_scoreboard(self):
+        return HeadlessScoreboard(self)
+
+    def _create_play_button(self):
+        return None
+
+    def reset(self):
+        """Start a new game, as if the player had pressed Play."""
+        self._start_game()
+
+    def run(self, ticks, policy=None, stop_on_game_over=True):
+        """Advance the game by up to ticks fixed steps; return the number run.
+
+        policy is called as policy(game, tick) and returns the InputState for
+        that tick. With stop_on_game_over, the run ends as soon as the player
+        has lost their last ship.
+        """
+        if policy is None:
+            policy = idle_policy
+
+        for tick in range(ticks):
+            was_active = self.game_active
+            self.step(policy(self, self.ticks))
+            self.ticks += 1
+            if stop_on_game_over and was_active and not self.game_active:
+                return tick + 1
+        return ticks
+
+    def fast_forward(self, ticks):
+        """Skip up to ticks ticks with no input at once; return the number skipped.
+
+        With no bullets in flight and the ship standing still only the fleet
+        moves, so its motion is worked out in closed form. The skip stops
+        short of the first tick on which the fleet could reach the ship.
+        """
+        if not self.game_active or self.bullets or not self.aliens or self.pause_ticks:
+            return 0
+
+        reach = self.aliens.ticks_until_depth(self.ship.rect.top + 1)
+        if reach is not None:
+            ticks = min(ticks, reach - 1)
+        if ticks <= 0:
+            return 0
+
+        self.ship.moving_left = self.ship.moving_right = False
+        self.aliens.advance(ticks, self._change_fleet_direction)
+        self.ticks += ticks
+        return ticks
+
+def idle_policy(game, tick):
+    """Never touch the controls."""
+    return InputState()
+
+def scripted_policy(inputs):
+    """Return a policy that plays back a list of InputStates, then idles."""
+    def policy(game, tick):
+        if tick < len(inputs):
+            return inputs[tick]
+        return InputState()
+    return policy
+
+class RandomPolicy:
+    """A policy that wanders left and right and fires at random."""
+
+    def __init__(self, seed=None, fire_chance=0.2, turn_chance=0.05):
+        """Initialize the policy with its own random number generator."""
+        self.random = random.Random(seed)
+        self.fire_chance = fire_chance
+        self.turn_chance = turn_chance
+        self.direction = 0
+
+    def __call__(self, game, tick):
+        if self.random.random() < self.turn_chance:
+            self.direction = self.random.choice((-1, 0, 1))
+        return InputState(left=self.direction < 0, right=self.direction > 0,
+                          fire=self.random.random() < self.fire_chance)
+
+def tracking_policy(game, tick):
+    """Steer under the lowest alien and keep firing."""
+    aliens = game.aliens
+    if not aliens:
+        return InputState(fire=True)
+
+    # Aim for the alien closest to the bottom of the screen.
+    live = aliens.alive.nonzero()[0]
+    lowest = live[aliens.rect_y[live].argmax()]
+    target = int(aliens.rect_x[lowest]) + aliens.width // 2
+    ship_x = game.ship.rect.centerx
+    return InputState(left=target < ship_x - 2, right=target > ship_x + 2, fire=True)
+
+POLICIES = {
+    'idle': lambda seed: idle_policy,
+    'random': lambda seed: RandomPolicy(seed),
+    'tracking': lambda seed: tracking_policy,
+}
+
+def make_policy(name, seed=None):
+    """Return a new policy by name: 'idle', 'random' or 'tracking'."""
+    return POLICIES[name](seed)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--ticks', type=int, default=100_000)
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='tracking')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    game = HeadlessGame()
+    game.reset()
+    start = perf_counter()
+    ticks = game.run(args.ticks, make_policy(args.policy, args.seed))
+    elapsed = perf_counter() - start
+
+    print(f"ticks: {ticks}  score: {game.stats.score}  level: {game.stats.level}  "
+          f"ships left: {game.stats.ships_left}")
+    print(f"{ticks / elapsed:,.0f} ticks per second")
@@ -0,0 +1,64 @@
+from collections import OrderedDict
+
+import pygame
+
+class GlyphAtlas:
+    """A class to build number images from glyphs that are rendered only once."""
+
+    def __init__(self, font, text_color, bg_color, glyphs="0123456789,"):
+        """Render every glyph once and remember its image."""
+        self.bg_color = bg_color
+        self.glyphs = {glyph: font.render(glyph, True, text_color, bg_color)
+                       for glyph in glyphs}
+        self.height = max(image.get_height() for image in self.glyphs.values())
+
+    def can_render(self, text):
+        """Return True if every character of text is in the atlas."""
+        return all(char in self.glyphs for char in text)
+
+    def render(self, text):
+        """Return a new image of text made by blitting glyphs side by side."""
+        images = [self.glyphs[char] for char in text]
+        width = sum(image.get_width() for image in images)
+        surface = pygame.Surface((max(width, 1), self.height))
+        surface.fill(self.bg_color)
+
+        x = 0
+        blits = []
+        for image in images:
+            blits.append((image, (x, 0)))
+            x += image.get_width()
+        surface.blits(blits, doreturn=False)
+        return surface
+
+class HudText:
+    """A class to render HUD strings, reusing images it has already made."""
+
+    def __init__(self, font, text_color, bg_color, max_entries=64):
+        """Initialize an empty cache of rendered strings."""
+        self.font = font
+        self.text_color = text_color
+        self.bg_color = bg_color
+        self.max_entries = max_entries
+        self.images = OrderedDict()
+
+        # Numbers are built from glyphs instead of going through the font.
+        self.atlas = GlyphAtlas(font, text_color, bg_color)
+
+    def render(self, text):
+        """Return an image of text, rendering it only if it isn't cached."""
+        image = self.images.get(text)
+        if image is not None:
+            self.images.move_to_end(text)
+            return image
+
+        if self.atlas.can_render(text):
+            image = self.atlas.render(text)
+        else:
+            image = self.font.render(text, True, self.text_color, self.bg_color)
+
+        self.images[text] = image
+        if len(self.images) > self.max_entries:
+            # Drop the least recently used string.
+            self.images.popitem(last=False)
+        return image
@@ -0,0 +1,251 @@
+"""Run the game logic on a worker thread while the main thread draws.
+
+With render_mode 'pipelined', each frame hands its ticks to the logic
+thread, which steps the game and copies what the next frame shows into one
+of two FrameStates. Meanwhile the main thread draws and flips the other
+FrameState, from the ticks of the frame before. Blits and flips let go of
+the GIL, so the two can overlap, at the cost of showing input one frame
+later. Measure both sides of that trade against the serial loop with:
+
+    python pipeline.py --frames 600
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+from time import perf_counter
+
+import numpy as np
+import pygame
+
+from fleet_layer import FleetLayer
+
+class FrameState:
+    """A class to hold everything one frame draws, copied out of the game."""
+
+    def __init__(self):
+        """Initialize an empty state; capture() fills it in."""
+        # Bullets as (color, rect) pairs, and the ship's image and rect.
+        self.bullets = []
+        self.ship = None
+
+        # The fleet: its slots, which are only copied for a new fleet, which
+        #   aliens are alive, and where the fleet is drawn.
+        self.generation = None
+        self.slot_x = self.slot_y = self.alive = None
+        self.fleet_shift = 0
+        self.fleet_offset_y = 0
+
+        # The HUD and Play button as (source, rect) pairs, like the renderer's items.
+        self.hud = []
+        self.button = []
+
+    def capture(self, ai_game, alpha=1.0):
+        """Copy what ai_game shows, alpha of the way through its last tick."""
+        self.bullets = [(bullet.color, bullet.draw_rect(alpha)) for bullet in ai_game.bullets]
+        self.ship = (ai_game.ship.image, ai_game.ship.draw_rect(alpha))
+
+        fleet = ai_game.aliens
+        if fleet.generation != self.generation:
+            self.generation = fleet.generation
+            self.slot_x = fleet.slot_x.copy()
+            self.slot_y = fleet.slot_y.copy()
+            self.alive = fleet.alive.copy()
+        else:
+            np.copyto(self.alive, fleet.alive)
+        self.fleet_shift = fleet.draw_shift(alpha)
+        self.fleet_offset_y = fleet.offset_y
+
+        # HUD images are replaced, never changed, so holding on to them is safe.
+        sb = ai_game.sb
+        self.hud = []
+        if sb.score_image is not None:
+            self.hud.append((sb.score_image, sb.score_rect.copy()))
+            self.hud.append((sb.high_score_image, sb.high_score_rect.copy()))
+            self.hud.append((sb.level_image, sb.level_rect.copy()))
+        for ship in sb.ships.sprites():
+            self.hud.append((ship.image, ship.rect.copy()))
+
+        self.button = []
+        if not ai_game.game_active:
+            button = ai_game.play_button
+            self.button.append((button.button_color, button.rect.copy()))
+            self.button.append((button.msg_image, button.msg_image_rect.copy()))
+
+class GamePipeline:
+    """A class to step the game on a logic thread and draw the previous tick's state."""
+
+    def __init__(self, ai_game):
+        """Initialize the pipeline with the game's current state ready to draw."""
+        self.ai_game = ai_game
+        self.screen = ai_game.screen
+        self.settings = ai_game.settings
+
+        # The state being drawn and the one the logic thread writes to.
+        self.front = FrameState()
+        self.back = FrameState()
+        self.front.capture(ai_game)
+
+        # The main thread draws the fleet from its own layer, so it never
+        #   shares a surface with the logic thread.
+        self.layer = FleetLayer(ai_game.aliens.image)
+        self.generation = None
+        self.alive = None
+
+        # The mouse belongs to the main thread, so the logic thread only says
+        #   how it should be and wait() applies it.
+        self.mouse_visible = None
+        ai_game._set_mouse_visible = self._set_mouse_visible
+
+        self.jobs = queue.Queue(maxsize=1)
+        self.results = queue.Queue(maxsize=1)
+        self.busy = False
+        self.thread = threading.Thread(target=self._run_logic, name='game-logic', daemon=True)
+        self.thread.start()
+
+    def start(self, ticks, controls, alpha=1.0):
+        """Have the logic thread run ticks with controls, then capture the result."""
+        self.jobs.put((ticks, controls, alpha))
+        self.busy = True
+
+    def wait(self):
+        """Wait for the logic thread, then make its state the next one drawn."""
+        if not self.busy:
+            return
+        self.busy = False
+        error = self.results.get()
+        if error is not None:
+            raise error
+        self.front, self.back = self.back, self.front
+        if self.mouse_visible is not None:
+            pygame.mouse.set_visible(self.mouse_visible)
+            self.mouse_visible = None
+
+    def draw(self):
+        """Draw the front state in full and flip it to the display."""
+        state = self.front
+        screen = self.screen
+        screen.fill(self.settings.bg_color)
+
+        images = self.ai_game.bullets.image
+        screen.blits([(images(color, rect.size), rect) for color, rect in state.bullets],
+                     doreturn=False)
+        screen.blit(*state.ship)
+
+        surface = self._fleet_surface(state)
+        x, y = self.layer.origin
+        screen.blit(surface, (x + state.fleet_shift, y + state.fleet_offset_y))
+
+        screen.blits(state.hud, doreturn=False)
+        if state.button:
+            (color, rect), message = state.button
+            screen.fill(color, rect)
+            screen.blit(*message)
+        overlay = self.ai_game.profiler.overlay_item()
+        if overlay:
+            screen.blit(*overlay)
+        self.ai_game.present()
+
+    def close(self):
+        """Wait for any ticks under way and stop the logic thread."""
+        if self.busy:
+            self.busy = False
+            self.results.get()
+        self.jobs.put(None)
+        self.thread.join()
+        del self.ai_game._set_mouse_visible
+
+    def _set_mouse_visible(self, visible):
+        self.mouse_visible = visible
+
+    def _fleet_surface(self, state):
+        """Bring the layer up to date with the state's fleet and return its surface."""
+        layer = self.layer
+        if state.generation != self.generation:
+            layer.invalidate()
+            self.generation = state.generation
+            self.alive = state.alive.copy()
+        else:
+            killed = np.flatnonzero(self.alive > state.alive)
+            if len(killed):
+                layer.erase(state.slot_x, state.slot_y, killed)
+                self.alive[killed] = False
+        return layer.get_surface(state.slot_x, state.slot_y, state.alive)
+
+    def _run_logic(self):
+        """Run the jobs given to start() until close() is called."""
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            ticks, controls, alpha = job
+            try:
+                self.ai_game.run_ticks(ticks, controls)
+                self.back.capture(self.ai_game, alpha)
+            except Exception as error:
+                self.results.put(error)
+            else:
+                self.results.put(None)
+
+def measure(render_mode, frames, overrides=None):
+    """Play frames frames with one tick each; return throughput and input latency.
+
+    Latency is the time from reading a frame's input to the flip that first
+    shows its result: the same frame when serial, the next one when pipelined.
+    """
+    # Imported here so that the game itself doesn't load the benchmarks.
+    from batch import TunedSettings
+    from benchmark import RenderedGame
+    from headless import tracking_policy
+
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    settings = TunedSettings(dict(overrides or {}, render_mode=render_mode))
+    game = RenderedGame(settings)
+    game.reset()
+    pipeline = GamePipeline(game) if render_mode == 'pipelined' else None
+
+    inputs, shown = [], []
+    start = perf_counter()
+    for frame in range(frames):
+        inputs.append(perf_counter())
+        controls = tracking_policy(game, frame)
+        if pipeline:
+            pipeline.start(1, controls)
+            pipeline.draw()
+            shown.append(perf_counter())
+            pipeline.wait()
+        else:
+            game.run_ticks(1, controls)
+            game._update_screen()
+            shown.append(perf_counter())
+    elapsed = perf_counter() - start
+    if pipeline:
+        pipeline.close()
+        # A tick's result is first drawn on the frame after it.
+        latencies = np.subtract(shown[1:], inputs[:-1])
+    else:
+        latencies = np.subtract(shown, inputs)
+
+    return {
+        'render_mode': render_mode,
+        'frames_per_second': frames / elapsed,
+        'latency_ms': float(latencies.mean() * 1000),
+        'latency_p95_ms': float(np.percentile(latencies, 95) * 1000),
+        'final_score': game.stats.score,
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--settings', default='{}', help="settings to override, as JSON")
+    args = parser.parse_args()
+
+    overrides = json.loads(args.settings)
+    print(f"{'mode':<11}{'frames/s':>10}{'latency ms':>12}{'p95 ms':>9}")
+    for mode in ('full', 'dirty', 'pipelined'):
+        result = measure(mode, args.frames, overrides)
+        print(f"{mode:<11}{result['frames_per_second']:>10.1f}"
+              f"{result['latency_ms']:>12.2f}{result['latency_p95_ms']:>9.2f}")
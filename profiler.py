@@ -0,0 +1,153 @@
+import json
+from collections import deque
+from time import perf_counter
+
+import pygame
+
+class FrameProfiler:
+    """A class to time each phase of the main loop and report on the frame budget."""
+
+    def __init__(self, target_fps=60, window=600, trace_limit=100_000):
+        """Initialize the profiler with rolling windows of window frames."""
+        self.budget = 1 / target_fps
+        self.window = window
+
+        # Rolling timings in seconds: whole frames and each named section.
+        self.frame_times = deque(maxlen=window)
+        self.section_times = {}
+        self.frames = 0
+        self.missed_deadlines = 0
+
+        # Every timed call as (name, start, end), for the Chrome trace.
+        self.trace = deque(maxlen=trace_limit)
+        self.origin = perf_counter()
+        self.frame_start = None
+
+        # The on-screen overlay, refreshed a few times a second.
+        self.show_overlay = False
+        self.overlay_image = None
+        self.overlay_rect = None
+        self.font = None
+
+        # Other metrics to add to the summary, by name; each is a function
+        #   that returns a dict.
+        self.extra_metrics = {}
+
+    def instrument(self, obj, name, label=None):
+        """Replace the method obj.name with one that times every call."""
+        method = getattr(obj, name)
+        label = label or name
+        profiler = self
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                profiler.record(label, start, perf_counter())
+
+        setattr(obj, name, timed)
+
+    def start_frame(self):
+        """Mark the start of a frame."""
+        self.frame_start = perf_counter()
+
+    def end_frame(self):
+        """Mark the end of a frame's work, before the clock waits."""
+        end = perf_counter()
+        self.record('frame', self.frame_start, end)
+        self.frames += 1
+
+        elapsed = end - self.frame_start
+        self.frame_times.append(elapsed)
+        if elapsed > self.budget:
+            self.missed_deadlines += 1
+
+        if self.show_overlay and self.frames % 15 == 0:
+            self._prep_overlay()
+
+    def record(self, name, start, end):
+        """Store one timed call of the named section."""
+        if name != 'frame':
+            times = self.section_times.get(name)
+            if times is None:
+                times = self.section_times[name] = deque(maxlen=self.window)
+            times.append(end - start)
+        self.trace.append((name, start, end))
+
+    def toggle_overlay(self):
+        """Show or hide the timing overlay."""
+        self.show_overlay = not self.show_overlay
+        if self.show_overlay:
+            self._prep_overlay()
+
+    def overlay_item(self):
+        """Return the overlay image and its rect, or None if it is hidden."""
+        if not self.show_overlay or self.overlay_image is None:
+            return None
+        return self.overlay_image, self.overlay_rect
+
+    def summary(self):
+        """Return the rolling percentiles of frames and sections in milliseconds."""
+        sections = {name: _percentiles(times) for name, times in self.section_times.items()}
+        return {
+            'frames': self.frames,
+            'budget_ms': self.budget * 1000,
+            'missed_deadlines': self.missed_deadlines,
+            'frame': _percentiles(self.frame_times),
+            'sections': sections,
+            **{name: metrics() for name, metrics in self.extra_metrics.items()},
+        }
+
+    def export_json(self, path):
+        """Write the summary to path as JSON."""
+        with open(path, 'w') as file:
+            json.dump(self.summary(), file, indent=2)
+
+    def export_chrome_trace(self, path):
+        """Write the recorded calls to path in Chrome's trace event format."""
+        events = []
+        for name, start, end in self.trace:
+            events.append({
+                'name': name, 'ph': 'X', 'pid': 0, 'tid': 0,
+                'ts': (start - self.origin) * 1e6, 'dur': (end - start) * 1e6,
+            })
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+    def _prep_overlay(self):
+        """Render the current summary into the overlay image."""
+        if self.font is None:
+            # The default font needs no search of the system's fonts.
+            self.font = pygame.font.Font(None, 20)
+
+        summary = self.summary()
+        frame = summary['frame']
+        lines = [f"frame p50 {frame['p50']:.2f}  p95 {frame['p95']:.2f}  "
+                 f"p99 {frame['p99']:.2f} ms  missed {self.missed_deadlines}"]
+        for name, times in sorted(summary['sections'].items()):
+            lines.append(f"{name:<32} p50 {times['p50']:.2f}  p99 {times['p99']:.2f}")
+
+        images = [self.font.render(line, True, (255, 255, 255), (0, 0, 0)) for line in lines]
+        width = max(image.get_width() for image in images) + 10
+        height = sum(image.get_height() for image in images) + 10
+        self.overlay_image = pygame.Surface((width, height))
+        y = 5
+        for image in images:
+            self.overlay_image.blit(image, (5, y))
+            y += image.get_height()
+
+        # Sit below the ships left, clear of the rest of the HUD.
+        self.overlay_rect = self.overlay_image.get_rect()
+        self.overlay_rect.topleft = (10, 70)
+
+def _percentiles(times):
+    """Return the p50, p95 and p99 of times in milliseconds."""
+    ordered = sorted(times)
+    if not ordered:
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+
+    def pick(fraction):
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)] * 1000
+
+    return {'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99)}
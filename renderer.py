@@ -0,0 +1,154 @@
+import pygame
+
+class DirtyRectRenderer:
+    """A class to redraw and present only the parts of the screen that changed."""
+
+    def __init__(self, ai_game):
+        """Initialize the renderer; the first frame is always drawn in full."""
+        self.ai_game = ai_game
+        self.screen = ai_game.screen
+        self.screen_rect = self.screen.get_rect()
+        self.settings = ai_game.settings
+
+        # Everything drawn on the last frame, as (source, rect) pairs.
+        self.last_items = []
+        self.full_redraw = True
+
+        # The fleet layer is changed in place when aliens are shot down, so
+        #   its version is what shows it needs drawing again.
+        self.fleet_version = None
+        self.fleet_rect = None
+        # Frames between moves of the fleet on screen; more redraws less.
+        self.fleet_interval = 1
+
+        # Frames that were drawn and frames skipped because nothing moved.
+        self.frames_drawn = 0
+        self.frames_skipped = 0
+
+    def invalidate(self):
+        """Redraw the whole screen on the next frame."""
+        self.full_redraw = True
+
+    def draw(self, alpha=1.0):
+        """Draw the game, updating only changed regions; return False if skipped.
+
+        Moving things are drawn alpha of the way from their positions before
+        the last tick to their current ones.
+        """
+        items = self._collect_items(alpha)
+
+        if self.full_redraw:
+            self.screen.fill(self.settings.bg_color)
+            self._draw_items(items)
+            self.ai_game.present()
+            self.full_redraw = False
+        else:
+            dirty = self._dirty_rects(items)
+            if self.fleet_version != self.ai_game.aliens.layer_version and self.fleet_rect:
+                dirty.append(self.fleet_rect.clip(self.screen_rect))
+            if not dirty:
+                # Nothing moved or changed, so the screen is already up to date.
+                self.last_items = items
+                self.frames_skipped += 1
+                return False
+
+            # Where something moved, its old and new places mostly overlap,
+            #   so they are cleared and redrawn together.
+            dirty = _merge_rects(dirty)
+            for rect in dirty:
+                # Only the items that reach into the region are drawn again,
+                #   and only inside it.
+                self.screen.set_clip(rect)
+                self.screen.fill(self.settings.bg_color, rect)
+                self._draw_items([item for item in items if rect.colliderect(item[1])])
+            self.screen.set_clip(None)
+            self.ai_game.present(dirty)
+
+        self.last_items = items
+        self.fleet_version = self.ai_game.aliens.layer_version
+        self.frames_drawn += 1
+        return True
+
+    def _collect_items(self, alpha):
+        """Return everything on screen in drawing order as (source, rect) pairs.
+
+        source is either a Surface to blit or a color to fill the rect with.
+        """
+        game = self.ai_game
+        items = []
+
+        for bullet in game.bullets:
+            items.append((bullet.color, bullet.draw_rect(alpha).clip(self.screen_rect)))
+        items.append((game.ship.image, game.ship.draw_rect(alpha)))
+
+        # The whole fleet is one item, drawn with one blit of its layer.
+        fleet = game.aliens
+        last_fleet_rect, self.fleet_rect = self.fleet_rect, None
+        if fleet:
+            frame = self.frames_drawn + self.frames_skipped
+            if (self.fleet_interval > 1 and frame % self.fleet_interval and last_fleet_rect
+                    and fleet.layer_version == self.fleet_version):
+                # Hold the fleet where it was last drawn, to redraw less of the screen.
+                self.fleet_rect = last_fleet_rect
+            else:
+                self.fleet_rect = fleet.layer_rect(alpha)
+            items.append((fleet.get_layer(), self.fleet_rect))
+
+        sb = game.sb
+        if sb.score_image is not None:
+            items.append((sb.score_image, sb.score_rect.copy()))
+            items.append((sb.high_score_image, sb.high_score_rect.copy()))
+            items.append((sb.level_image, sb.level_rect.copy()))
+        for ship in sb.ships.sprites():
+            items.append((ship.image, ship.rect.copy()))
+
+        if not game.game_active:
+            button = game.play_button
+            items.append((button.button_color, button.rect.copy()))
+            items.append((button.msg_image, button.msg_image_rect.copy()))
+
+        overlay = game.profiler.overlay_item()
+        if overlay:
+            items.append((overlay[0], overlay[1].copy()))
+
+        return items
+
+    def _dirty_rects(self, items):
+        """Return the regions covered by items that appeared or disappeared."""
+        old = {self._item_key(item) for item in self.last_items}
+        new = {self._item_key(item) for item in items}
+        changed = old ^ new
+        return [pygame.Rect(key[1]) for key in changed]
+
+    def _item_key(self, item):
+        """Return a hashable key that changes when the item's look or place does."""
+        source, rect = item
+        # A re-rendered HUD image is a new Surface, so its identity is enough.
+        #   The previous frame's items keep the old Surfaces alive meanwhile.
+        look = source if isinstance(source, tuple) else id(source)
+        return (look, tuple(rect))
+
+    def _draw_items(self, items):
+        """Draw items to the screen in order, blitting each run of Surfaces in one call."""
+        run = []
+        for source, rect in items:
+            if isinstance(source, tuple):
+                if run:
+                    self.screen.blits(run, doreturn=False)
+                    run = []
+                self.screen.fill(source, rect)
+            else:
+                run.append((source, rect))
+        if run:
+            self.screen.blits(run, doreturn=False)
+
+def _merge_rects(rects):
+    """Return rects with every group of overlapping ones replaced by their union."""
+    merged = []
+    for rect in rects:
+        # A union can reach rects it didn't touch before, so keep absorbing
+        #   until it overlaps none of the others.
+        while (index := rect.collidelist(merged)) != -1:
+            rect = rect.union(merged.pop(index))
+        merged.append(rect)
+    return merged
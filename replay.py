@@ -0,0 +1,236 @@
+"""Record the input of a game of Alien Invasion and replay it headless.
+
+A replay holds the settings, the random seed, the high score to beat and
+one InputState per tick, run-length encoded, along with the stats the game
+finished with. Replaying plays the same ticks headless and checks the stats
+come out the same:
+
+    python alien_invasion.py --record game.air
+    python replay.py game.air
+"""
+
+import argparse
+import json
+import os
+import random
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+from game_input import InputState
+from settings import Settings
+
+# File signature; the last byte is the format version.
+MAGIC = b'AIR\x01'
+
+# The GameStats a replay has to reproduce.
+STAT_NAMES = ('score', 'level', 'ships_left', 'high_score')
+
+class Replay:
+    """A class to hold one recorded game: its settings, seed, input and result."""
+
+    def __init__(self, settings, seed=0, runs=None, stats=None, start_high_score=0):
+        """Initialize a replay; runs is a list of (input bits, ticks) pairs."""
+        self.settings = settings
+        self.seed = seed
+        self.start_high_score = start_high_score
+        self.runs = runs if runs is not None else []
+        self.stats = stats if stats is not None else {}
+
+    @property
+    def ticks(self):
+        """The number of ticks recorded."""
+        return sum(length for bits, length in self.runs)
+
+    def save(self, path):
+        """Write the replay to path in its compact binary form."""
+        settings = zlib.compress(json.dumps(self.settings, sort_keys=True).encode())
+        data = bytearray(MAGIC)
+        write_varint(data, self.seed)
+        write_varint(data, self.start_high_score)
+        write_varint(data, len(settings))
+        data += settings
+        for name in STAT_NAMES:
+            write_varint(data, self.stats.get(name, 0))
+        write_varint(data, len(self.runs))
+        for bits, length in self.runs:
+            data.append(bits)
+            write_varint(data, length)
+
+        with open(path, 'wb') as file:
+            file.write(data)
+
+    @classmethod
+    def load(cls, path):
+        """Return the replay saved at path."""
+        with open(path, 'rb') as file:
+            data = file.read()
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an Alien Invasion replay")
+
+        position = len(MAGIC)
+        seed, position = read_varint(data, position)
+        start_high_score, position = read_varint(data, position)
+        size, position = read_varint(data, position)
+        settings = json.loads(zlib.decompress(data[position:position + size]))
+        position += size
+        stats = {}
+        for name in STAT_NAMES:
+            stats[name], position = read_varint(data, position)
+        count, position = read_varint(data, position)
+        runs = []
+        for _ in range(count):
+            bits = data[position]
+            length, position = read_varint(data, position + 1)
+            runs.append((bits, length))
+
+        # JSON has no tuples, but colors are expected to be tuples.
+        for name, value in settings.items():
+            if isinstance(value, list):
+                settings[name] = tuple(value)
+        return cls(settings, seed, runs, stats, start_high_score)
+
+class ReplayRecorder:
+    """A class to record the input of a game as it is played."""
+
+    def __init__(self, ai_game, path, seed=0):
+        """Take a snapshot of the settings and high score; call this before the game starts."""
+        if seed < 0:
+            raise ValueError("a replay's seed can't be negative")
+        self.ai_game = ai_game
+        self.path = path
+
+        # The game doesn't use randomness yet, but seeding it here keeps any
+        #   that is added reproducible from the replay.
+        random.seed(seed)
+        self.replay = Replay(snapshot_settings(ai_game.settings), seed,
+                             start_high_score=ai_game.stats.high_score)
+
+        # The run being recorded: its input bits and how many ticks it lasted.
+        self.bits = None
+        self.length = 0
+
+    def record(self, controls):
+        """Add the input used for one tick."""
+        bits = controls.to_bits()
+        if bits == self.bits:
+            self.length += 1
+            return
+        if self.length:
+            self.replay.runs.append((self.bits, self.length))
+        self.bits = bits
+        self.length = 1
+
+    def save(self):
+        """Store the game's current stats with the input and write the replay."""
+        if self.length:
+            self.replay.runs.append((self.bits, self.length))
+            self.bits, self.length = None, 0
+        self.replay.stats = final_stats(self.ai_game)
+        self.replay.save(self.path)
+
+def snapshot_settings(settings):
+    """Return the settings' values as a dict that can be saved as JSON."""
+    # Only real settings are kept, not the extra state of subclasses.
+    names = vars(Settings()).keys()
+    return {name: value for name, value in vars(settings).items() if name in names}
+
+def final_stats(ai_game):
+    """Return the game's stats that a replay must reproduce."""
+    return {name: getattr(ai_game.stats, name) for name in STAT_NAMES}
+
+def play_replay(replay):
+    """Play replay headless as fast as possible and return the finished game.
+
+    Ticks that change nothing are skipped, and runs with no input while the
+    game is active are fast-forwarded where the game allows it.
+    """
+    # Imported here so that only the processes that replay load pygame.
+    from batch import TunedSettings
+    from headless import HeadlessGame
+
+    random.seed(replay.seed)
+    game = HeadlessGame(TunedSettings(replay.settings))
+    # The recorded game had its stored best score to beat from the start.
+    game.stats.high_score = replay.start_high_score
+    for bits, length in replay.runs:
+        if not bits and not game.game_active:
+            # With no input and no game under way, a tick does nothing.
+            game.ticks += length
+            continue
+
+        controls = InputState.from_bits(bits)
+        remaining = length
+        while remaining:
+            if not bits:
+                remaining -= game.fast_forward(remaining)
+                if not remaining:
+                    break
+            game.step(controls)
+            game.ticks += 1
+            remaining -= 1
+    return game
+
+def verify_replay(path):
+    """Replay the file at path and return a dict saying whether its stats match."""
+    replay = Replay.load(path)
+    start = perf_counter()
+    game = play_replay(replay)
+    elapsed = perf_counter() - start
+
+    stats = final_stats(game)
+    return {
+        'path': path,
+        'ticks': game.ticks,
+        'seconds': elapsed,
+        'match': stats == replay.stats,
+        'expected': replay.stats,
+        'actual': stats,
+    }
+
+def verify_replays(paths, workers=None, chunksize=16):
+    """Verify many replays across a pool of processes; return their results in order."""
+    if len(paths) == 1 or workers == 1:
+        return [verify_replay(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(verify_replay, paths, chunksize=chunksize))
+
+def write_varint(data, value):
+    """Append value to data as an unsigned LEB128 varint."""
+    while value >= 0x80:
+        data.append((value & 0x7f) | 0x80)
+        value >>= 7
+    data.append(value)
+
+def read_varint(data, position):
+    """Return the varint at position in data and the position after it."""
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='+', help="replay files to verify")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    start = perf_counter()
+    results = verify_replays(args.paths, args.workers)
+    elapsed = perf_counter() - start
+
+    failures = 0
+    for result in results:
+        if not result['match']:
+            failures += 1
+            print(f"MISMATCH {result['path']}: expected {result['expected']}, "
+                  f"got {result['actual']}")
+    print(f"{len(results) - failures} of {len(results)} replays verified "
+          f"in {elapsed:.2f}s ({len(results) / elapsed:,.0f} per second)")
+    if failures:
+        raise SystemExit(1)
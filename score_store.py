@@ -0,0 +1,138 @@
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    finished REAL NOT NULL,
+    duration REAL NOT NULL,
+    score INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    ships_lost INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_score ON runs (score DESC);
+"""
+
+INSERT_RUN = ("INSERT INTO runs (finished, duration, score, level, ships_lost) "
+              "VALUES (?, ?, ?, ?, ?)")
+
+# SQLite integers are 64-bit; scores from very long games are capped to fit.
+MAX_SCORE = 2**63 - 1
+
+class ScoreStore:
+    """A class to keep past runs and the high score in SQLite.
+
+    Runs are handed to a writer thread, which saves them in batches, so the
+    game loop never waits on the disk. The high score is read once when the
+    store opens, through the score index, and kept up to date in memory.
+    """
+
+    def __init__(self, path, batch_size=64, flush_interval=1.0):
+        """Open or create the database at path and start the writer thread."""
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        # This connection belongs to the game thread and is only read from.
+        self.connection = self._connect()
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+        best = self.connection.execute("SELECT MAX(score) FROM runs").fetchone()[0]
+        self.best = best or 0
+
+        self.pending = queue.Queue()
+        # What stopped the writer thread, if anything did.
+        self.error = None
+        self.thread = threading.Thread(target=self._write_runs, name='score-store', daemon=True)
+        self.thread.start()
+
+    def high_score(self):
+        """Return the best score of every run recorded so far."""
+        return self.best
+
+    def record_run(self, score, level, duration, ships_lost):
+        """Queue a finished run to be saved; this never waits on the disk."""
+        score = min(score, MAX_SCORE)
+        self.best = max(self.best, score)
+        self.pending.put((time.time(), duration, score, level, ships_lost))
+
+    def top_scores(self, count=10):
+        """Return the count best runs as dicts, best first.
+
+        Runs still waiting to be written are not included; call flush() first
+        to see them.
+        """
+        rows = self.connection.execute(
+            "SELECT score, level, duration, ships_lost, finished FROM runs "
+            "ORDER BY score DESC LIMIT ?", (count,))
+        names = ('score', 'level', 'duration', 'ships_lost', 'finished')
+        return [dict(zip(names, row)) for row in rows]
+
+    def flush(self):
+        """Wait until every queued run has been written.
+
+        If the writer thread has stopped, the runs it left will never be
+        written, so this raises instead of waiting for them.
+        """
+        done = self.pending.all_tasks_done
+        with done:
+            while self.pending.unfinished_tasks and self.thread.is_alive():
+                done.wait(0.1)
+        self._check_writer()
+
+    def close(self):
+        """Write the runs still queued, then stop the thread and close the database."""
+        self.pending.put(None)
+        self.thread.join()
+        self.connection.close()
+        self._check_writer()
+
+    def _connect(self):
+        # Each connection is only used by one thread at a time, but the game's
+        #   may be opened on the logic thread when the game runs pipelined.
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        # Write-ahead logging lets the game read while the writer thread writes.
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def _check_writer(self):
+        """Raise the error that stopped the writer thread, if one did."""
+        if self.error is not None:
+            raise RuntimeError(f"runs could not be saved to {self.path}") from self.error
+
+    def _write_runs(self):
+        """Save queued runs in batches until close() is called."""
+        try:
+            self._write_batches()
+        except Exception as error:
+            # Nothing more will be saved; flush() and close() report why.
+            self.error = error
+
+    def _write_batches(self):
+        """Save queued runs in batches until the None that close() queues."""
+        connection = self._connect()
+        running = True
+        while running:
+            # Wait for a run, then gather any more that arrive shortly after it.
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1] is not None and len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            if batch[-1] is None:
+                running = False
+            runs = [run for run in batch if run is not None]
+            if runs:
+                with connection:
+                    connection.executemany(INSERT_RUN, runs)
+            for _ in batch:
+                self.pending.task_done()
+        connection.close()
@@ -1,7 +1,7 @@
-import pygame.font
 from pygame.sprite import Group
 
 from ship import Ship
+from hud_text import HudText
 
 class Scoreboard:
     """A class to report scoring information."""
@@ -15,10 +15,23 @@ class Scoreboard:
         
         # Font settings for scoring information
         self.text_color = (30, 30, 30)
-        self.font = pygame.font.SysFont(None, 48)
+        self.font = ai_game.assets.load_font(None, 48)
+        self.text = HudText(self.font, self.text_color, self.settings.bg_color)
         
-        # Prepare the initial score, high score, level and ships for the image.
-        self.prep_images()
+        # The values currently shown, so unchanged values aren't rendered again.
+        self.shown_score = None
+        self.shown_high_score = None
+        self.shown_level = None
+        
+        # While deferring, a changed score only marks the images stale, and
+        #   flush_renders() renders them a few times a second instead.
+        self.deferring = False
+        self.stale = False
+        
+        # The images are prepared by prep_images(), once the game has shown
+        #   its first frame.
+        self.score_image = self.high_score_image = self.level_image = None
+        self.ships = Group()
     
     def prep_images(self):
         self.prep_score()
@@ -37,8 +50,12 @@ class Scoreboard:
         
     def prep_level(self):
         """Turn the level into a rendered image."""
+        if self.stats.level == self.shown_level:
+            return
+        self.shown_level = self.stats.level
+        
         level_str = str(self.stats.level)
-        self.level_image = self.font.render(level_str, True, self.text_color, self.settings.bg_color)
+        self.level_image = self.text.render(level_str)
         
         # Position the level below the score
         self.level_rect = self.level_image.get_rect()
@@ -48,8 +65,15 @@ class Scoreboard:
     def prep_high_score(self):
         """Turn the high score into a rendered image"""
         rounded_score = round(self.stats.high_score, -1)
+        if rounded_score == self.shown_high_score:
+            return
+        if self.deferring and self.high_score_image is not None:
+            self.stale = True
+            return
+        self.shown_high_score = rounded_score
+        
         high_score_str = f"{rounded_score:,}"
-        self.high_score_image = self.font.render(high_score_str, True, self.text_color, self.settings.bg_color)
+        self.high_score_image = self.text.render(high_score_str)
         
         # Display the score at the top left of the screen
         self.high_score_rect = self.high_score_image.get_rect()
@@ -59,16 +83,35 @@ class Scoreboard:
     def prep_score(self):
         """Turn the score into a rendered image."""
         rounded_score = round(self.stats.score, -1)
+        if rounded_score == self.shown_score:
+            return
+        if self.deferring and self.score_image is not None:
+            self.stale = True
+            return
+        self.shown_score = rounded_score
+        
         score_str = f"{rounded_score:,}"
-        self.score_image = self.font.render(score_str, True, self.text_color, self.settings.bg_color)
+        self.score_image = self.text.render(score_str)
         
         # Display the score at the top right of the screen
         self.score_rect = self.score_image.get_rect()
         self.score_rect.right = self.screen_rect.right - 20
         self.score_rect.top = 20
         
+    def flush_renders(self):
+        """Render the score images that were deferred."""
+        if not self.stale:
+            return
+        self.stale = False
+        deferring, self.deferring = self.deferring, False
+        self.prep_score()
+        self.prep_high_score()
+        self.deferring = deferring
+        
     def show_score(self):
         """Draw scores, level and ships to the screen."""
+        if self.score_image is None:
+            return
         self.screen.blit(self.score_image, self.score_rect)
         self.screen.blit(self.high_score_image, self.high_score_rect)
         self.screen.blit(self.level_image, self.level_rect)
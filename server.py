@@ -0,0 +1,246 @@
+"""Host many headless games of Alien Invasion in one process over local sockets.
+
+Every connection gets its own game session. All sessions are stepped by
+one asyncio tick scheduler at the logic rate, and each tick every session
+is sent a delta of what changed in its game (see state_delta.py).
+
+A client starts by sending one line of JSON with the settings to override,
+such as {} or {"bullets_allowed": 10}. After that, each byte it sends is the
+input for the following ticks, packed by InputState.to_bits(). Held keys last
+until the next byte; a fire or start press is used by the next tick.
+
+    python server.py --port 8765
+    python client.py --port 8765 --clients 200
+"""
+
+import argparse
+import asyncio
+import json
+from time import perf_counter
+
+from batch import TunedSettings
+from game_input import InputState
+from headless import HeadlessGame
+from settings import Settings
+from state_delta import LENGTH, DeltaEncoder, error_frame
+
+# The largest screen a client may ask for. The fleet fills the screen, so a
+#   bigger one costs more memory and time than one game should take.
+SIZE_LIMITS = {'screen_width': 3840, 'screen_height': 2160}
+
+class GameSession:
+    """A class to hold one client's game and the input it has sent."""
+
+    def __init__(self, overrides, writer):
+        """Initialize a new game with the client's settings, waiting for Play."""
+        self.game = HeadlessGame(TunedSettings(overrides))
+        self.writer = writer
+        self.encoder = DeltaEncoder()
+        self.controls = InputState()
+
+        # Deltas and bytes sent, and ticks whose delta waited on a slow client.
+        self.deltas_sent = 0
+        self.bytes_sent = 0
+        self.deltas_held = 0
+
+    def receive(self, data):
+        """Take in input bytes from the client; presses are kept until a tick uses them."""
+        for bits in data:
+            controls = InputState.from_bits(bits)
+            self.controls.left = controls.left
+            self.controls.right = controls.right
+            self.controls.fire |= controls.fire
+            self.controls.start |= controls.start
+
+    def tick(self):
+        """Step the game once with the input received so far."""
+        game = self.game
+        if game.game_active:
+            # Like the Play button, start does nothing once a game is under way.
+            self.controls.start = False
+        game.step(self.controls)
+        game.ticks += 1
+        self.controls.clear_presses()
+
+    def end(self, reason):
+        """Tell the client why its session is over and disconnect it."""
+        if not self.writer.transport.is_closing():
+            self.writer.write(error_frame(reason))
+        self.writer.close()
+
+    def send_delta(self, max_buffer):
+        """Send the client what changed since its last delta.
+
+        While the client is slow to read, nothing more is queued for it; the
+        next delta it gets covers every tick it missed.
+        """
+        transport = self.writer.transport
+        if transport.is_closing():
+            return
+        if transport.get_write_buffer_size() > max_buffer:
+            self.deltas_held += 1
+            return
+        delta = self.encoder.encode(self.game, self.game.ticks)
+        if delta is None:
+            return
+        self.writer.write(LENGTH.pack(len(delta)) + delta)
+        self.deltas_sent += 1
+        self.bytes_sent += LENGTH.size + len(delta)
+
+class GameServer:
+    """A class to step many game sessions together at a steady tick rate."""
+
+    def __init__(self, logic_rate=None, max_ticks_behind=None, max_buffer=64 * 1024):
+        """Initialize a server with no sessions; the rates default to the game's settings."""
+        settings = Settings()
+        self.logic_rate = logic_rate or settings.logic_rate
+        self.max_ticks_behind = max_ticks_behind or settings.max_ticks_per_frame
+        self.max_buffer = max_buffer
+        self.sessions = set()
+
+        # Ticks run, ticks that started late and ticks given up on to catch up.
+        self.ticks = 0
+        self.late_ticks = 0
+        self.dropped_ticks = 0
+        # Time spent stepping and encoding sessions, out of the time elapsed.
+        self.busy_time = 0.0
+        self.started = None
+
+    async def serve(self, host='127.0.0.1', port=8765, path=None):
+        """Accept clients on a TCP port, or a Unix socket at path, and run the ticks."""
+        if path:
+            server = await asyncio.start_unix_server(self._handle_client, path)
+        else:
+            server = await asyncio.start_server(self._handle_client, host, port)
+        async with server:
+            await self.run_ticks()
+
+    async def run_ticks(self):
+        """Step every session once per tick, for as long as the server runs."""
+        loop = asyncio.get_running_loop()
+        tick_time = 1 / self.logic_rate
+        self.started = perf_counter()
+        next_tick = loop.time()
+        while True:
+            now = loop.time()
+            if now - next_tick > self.max_ticks_behind * tick_time:
+                # Too far behind to catch up; let the games slow down instead.
+                behind = int((now - next_tick) / tick_time)
+                self.dropped_ticks += behind
+                next_tick += behind * tick_time
+            if now - next_tick > tick_time:
+                self.late_ticks += 1
+
+            start = perf_counter()
+            for session in list(self.sessions):
+                try:
+                    session.tick()
+                    session.send_delta(self.max_buffer)
+                except Exception as error:
+                    # One broken game must not stop every other session's ticks.
+                    print(f"dropped a session: {error!r}")
+                    self.sessions.discard(session)
+                    session.end(f"the game failed: {error}")
+            self.busy_time += perf_counter() - start
+            self.ticks += 1
+
+            next_tick += tick_time
+            await asyncio.sleep(max(next_tick - loop.time(), 0))
+
+    def metrics(self):
+        """Return the server's load and timing as a dict."""
+        elapsed = perf_counter() - self.started if self.started else 0.0
+        return {
+            'sessions': len(self.sessions),
+            'ticks': self.ticks,
+            'ticks_per_second': self.ticks / elapsed if elapsed else 0.0,
+            'late_ticks': self.late_ticks,
+            'dropped_ticks': self.dropped_ticks,
+            'load': self.busy_time / elapsed if elapsed else 0.0,
+            'deltas_sent': sum(session.deltas_sent for session in self.sessions),
+            'bytes_sent': sum(session.bytes_sent for session in self.sessions),
+            'deltas_held': sum(session.deltas_held for session in self.sessions),
+        }
+
+    async def _handle_client(self, reader, writer):
+        """Run one client's session until it disconnects."""
+        try:
+            hello = await reader.readline()
+            overrides = check_overrides(json.loads(hello or b'{}'))
+            session = GameSession(overrides, writer)
+        except Exception as error:
+            # Settings that pass the checks can still be too much for pygame.
+            writer.write(error_frame(f"refused: {error}"))
+            writer.close()
+            print(f"refused a client: {error!r}")
+            return
+
+        self.sessions.add(session)
+        try:
+            while data := await reader.read(256):
+                session.receive(data)
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions.discard(session)
+            writer.close()
+
+def check_overrides(overrides):
+    """Return a client's settings overrides, or raise ValueError if any isn't a real setting.
+
+    Each value must have the type of the setting's default; whole numbers
+    are accepted for float settings, and lists for tuples such as colors.
+    """
+    if not isinstance(overrides, dict):
+        raise ValueError("settings must be a JSON object")
+    defaults = vars(Settings())
+    checked = {}
+    for name, value in overrides.items():
+        if name not in defaults:
+            raise ValueError(f"unknown setting: {name}")
+        default = defaults[name]
+        if isinstance(default, tuple) and isinstance(value, list):
+            value = tuple(value)
+        if isinstance(default, float) and type(value) is int:
+            value = float(value)
+        if type(value) is not type(default):
+            raise ValueError(f"{name} must be of type {type(default).__name__}, "
+                             f"not {type(value).__name__}")
+        if isinstance(default, tuple) and (
+                len(value) != len(default) or not all(type(item) is int for item in value)):
+            raise ValueError(f"{name} must be {len(default)} whole numbers")
+        if name in SIZE_LIMITS and not 0 < value <= SIZE_LIMITS[name]:
+            raise ValueError(f"{name} must be from 1 to {SIZE_LIMITS[name]}")
+        checked[name] = value
+    return checked
+
+async def _report(server, interval):
+    """Print the server's metrics every interval seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        metrics = server.metrics()
+        print(f"{metrics['sessions']} sessions  {metrics['ticks_per_second']:.1f} ticks/s  "
+              f"load {metrics['load']:.0%}  late {metrics['late_ticks']}  "
+              f"dropped {metrics['dropped_ticks']}  "
+              f"{metrics['bytes_sent'] / max(metrics['deltas_sent'], 1):.0f} bytes/delta")
+
+async def _main(args):
+    server = GameServer(args.logic_rate)
+    if args.report:
+        asyncio.create_task(_report(server, args.report))
+    await server.serve(args.host, args.port, args.unix)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead")
+    parser.add_argument('--logic-rate', type=int, help="ticks per second")
+    parser.add_argument('--report', type=float, default=5.0,
+                        help="seconds between metrics reports, 0 for none")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
@@ -9,6 +9,31 @@ class Settings:
         self.screen_width = 1200
         self.screen_height = 800
         self.bg_color = (230, 230, 230)
+        # 'full' redraws everything each frame; 'dirty' redraws only what
+        #   changed; 'pipelined' redraws everything while a second thread runs
+        #   the logic. Compare them with pipeline.py before changing this.
+        self.render_mode = 'full'
+        
+        # Timing Settings
+        # The game logic runs in fixed ticks, logic_rate times a second, and
+        #   every speed is in pixels per tick. Frames are drawn up to
+        #   target_fps times a second (0 for as fast as possible), whatever
+        #   the logic rate.
+        self.logic_rate = 60
+        self.target_fps = 60
+        # A frame that runs late catches up on at most this many ticks.
+        self.max_ticks_per_frame = 5
+        # Draw less when frames keep missing their deadline, and draw fully
+        #   again once there is room.
+        self.adaptive_quality = True
+        # Seconds the game holds still after the ship is hit.
+        self.ship_hit_pause = 0.5
+        
+        # Asset Settings
+        self.image_cache_bytes = 16 * 1024 * 1024
+        
+        # Score Settings: past runs and the high score are kept in this file.
+        self.score_db_path = 'scores.db'
         
         # Ship Settings
         self.ship_limit = 3
@@ -21,6 +46,9 @@ class Settings:
         
         # Alien Settings
         self.fleet_drop_speed = 10
+        # Shape of each new fleet: 'grid', 'staggered', 'diamond' or one
+        #   added with formations.register_formation().
+        self.fleet_formation = 'grid'
         
         # How quickly the game speeds up
         self.speedup_scale = 1.1
@@ -1,4 +1,3 @@
-import pygame
 from pygame.sprite import Sprite
 
 class Ship(Sprite):
@@ -12,15 +11,17 @@ class Ship(Sprite):
         self.settings = ai_game.settings
         self.screen_rect = ai_game.screen.get_rect()
         
-        # Load the ship image and get its rect.
-        self.image = pygame.image.load('images/ship.bmp')
+        # Load the ship image from the asset cache and get its rect.
+        self.image = ai_game.assets.load_image('images/ship.bmp')
         self.rect = self.image.get_rect()
         
         # Start each new ship at the bottom center of the screen
         self.rect.midbottom = self.screen_rect.midbottom
         
-        # Store a float for the ship's exact horizontal position.
+        # Store a float for the ship's exact horizontal position, and where
+        #   it was before the last update for drawing between ticks.
         self.x = float(self.rect.x)
+        self.previous_x = self.x
         
         # Movement flag; Start with a ship that's not moving (Right)
         self.moving_right = False
@@ -30,9 +31,11 @@ class Ship(Sprite):
         """Center the ship on the screen"""
         self.rect.midbottom = self.screen_rect.midbottom
         self.x = float(self.rect.x)
+        self.previous_x = self.x
     
     def update(self):
         """Update the ship's position based on the movement flag"""
+        self.previous_x = self.x
         # Update the ship's X value, not the rect.
         if self.moving_right and self.rect.right < self.screen_rect.right:
             self.x += self.settings.ship_speed
@@ -42,6 +45,14 @@ class Ship(Sprite):
         # Update rect object from self.x.
         self.rect.x = self.x
         
-    def blitme(self):
+    def draw_rect(self, alpha=1.0):
+        """Return the ship's rect alpha of the way from its last position to this one."""
+        if alpha >= 1.0:
+            return self.rect.copy()
+        rect = self.rect.copy()
+        rect.x = self.previous_x + (self.x - self.previous_x) * alpha
+        return rect
+    
+    def blitme(self, alpha=1.0):
         """Draw the ship at its current location"""
-        self.screen.blit(self.image, self.rect)
\ No newline at end of file
+        self.screen.blit(self.image, self.draw_rect(alpha))
\ No newline at end of file
@@ -0,0 +1,143 @@
+"""Capture the complete state of a game of Alien Invasion as a flat buffer.
+
+A snapshot holds everything that changes while the game is played: the
+dynamic settings, the stats, the ship, the bullets in flight and the fleet.
+It holds no Surfaces, so it is small, quick to take and can be saved or sent
+anywhere as bytes. Restoring it into a game with the same static settings
+puts that game exactly where the snapshot was taken.
+"""
+
+import struct
+from time import perf_counter
+
+import numpy as np
+
+# Signature of a snapshot; the last byte is the format version.
+MAGIC = b'AIS\x01'
+
+# Fixed-size part of a snapshot. Scores and points grow without bound, so
+#   they are stored as 16-byte integers.
+HEADER = struct.Struct(
+    '<4s'        # magic
+    '?BB'        # game active, held ship movement, input bits
+    'qq'         # ticks, pause ticks
+    'dddq16s'    # ship, bullet and alien speeds, fleet direction, alien points
+    'qq16s16s'   # ships left, level, score, high score
+    'd'          # ship x
+    'dqdq'       # fleet anchor x, moves, step, offset y
+    'qq'         # number of fleet slots, number of bullets
+)
+
+class GameSnapshot:
+    """A class to hold one game state as bytes."""
+
+    def __init__(self, data):
+        """Wrap bytes made by capture() or to_bytes()."""
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("not an Alien Invasion snapshot")
+        self.data = bytes(data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __eq__(self, other):
+        return isinstance(other, GameSnapshot) and self.data == other.data
+
+    def to_bytes(self):
+        """Return the snapshot as bytes."""
+        return self.data
+
+    @classmethod
+    def capture(cls, ai_game):
+        """Return a snapshot of ai_game's current state."""
+        settings, stats = ai_game.settings, ai_game.stats
+        ship, fleet = ai_game.ship, ai_game.aliens
+        bullets = ai_game.bullets.active
+
+        moving = ship.moving_left | (ship.moving_right << 1)
+        header = HEADER.pack(
+            MAGIC, ai_game.game_active, moving, ai_game.controls.to_bits(),
+            getattr(ai_game, 'ticks', 0), ai_game.pause_ticks,
+            settings.ship_speed, settings.bullet_speed, settings.alien_speed,
+            settings.fleet_direction, _pack_int(settings.alien_points),
+            stats.ships_left, stats.level, _pack_int(stats.score), _pack_int(stats.high_score),
+            ship.x,
+            fleet.anchor_x, fleet.moves, fleet.step, fleet.offset_y,
+            len(fleet.slot_x), len(bullets),
+        )
+
+        rects = np.array([tuple(bullet.rect) for bullet in bullets], dtype=np.int64)
+        ys = np.array([bullet.y for bullet in bullets], dtype=np.float64)
+        return cls(b''.join((
+            header,
+            fleet.slot_x.astype(np.int64, copy=False).tobytes(),
+            fleet.slot_y.astype(np.int64, copy=False).tobytes(),
+            fleet.alive.tobytes(),
+            rects.tobytes(),
+            ys.tobytes(),
+        )))
+
+    def restore(self, ai_game):
+        """Put ai_game back in the state this snapshot was taken in."""
+        (_, game_active, moving, controls, ticks, pause_ticks,
+         ship_speed, bullet_speed, alien_speed, fleet_direction, alien_points,
+         ships_left, level, score, high_score,
+         ship_x,
+         anchor_x, moves, step, offset_y,
+         slots, bullet_count) = HEADER.unpack_from(self.data)
+
+        settings, stats = ai_game.settings, ai_game.stats
+        settings.ship_speed = ship_speed
+        settings.bullet_speed = bullet_speed
+        settings.alien_speed = alien_speed
+        settings.fleet_direction = fleet_direction
+        settings.alien_points = _unpack_int(alien_points)
+
+        stats.ships_left = ships_left
+        stats.level = level
+        stats.score = _unpack_int(score)
+        stats.high_score = _unpack_int(high_score)
+
+        ai_game.game_active = game_active
+        ai_game.pause_ticks = pause_ticks
+        # Play carries on from here as a run of its own.
+        ai_game.run_started = perf_counter()
+        if hasattr(ai_game, 'ticks'):
+            ai_game.ticks = ticks
+        ai_game.controls = type(ai_game.controls).from_bits(controls)
+
+        ship = ai_game.ship
+        ship.moving_left = bool(moving & 1)
+        ship.moving_right = bool(moving & 2)
+        ship.x = ship.previous_x = ship_x
+        ship.rect.x = ship_x
+
+        # The arrays follow the header in the order capture() wrote them.
+        position = HEADER.size
+        slot_x = np.frombuffer(self.data, np.int64, slots, position)
+        position += slot_x.nbytes
+        slot_y = np.frombuffer(self.data, np.int64, slots, position)
+        position += slot_y.nbytes
+        alive = np.frombuffer(self.data, bool, slots, position)
+        position += alive.nbytes
+        rects = np.frombuffer(self.data, np.int64, 4 * bullet_count, position)
+        position += rects.nbytes
+        ys = np.frombuffer(self.data, np.float64, bullet_count, position)
+
+        ai_game.aliens.restore(slot_x, slot_y, alive, anchor_x, moves, step, offset_y)
+        ai_game.bullets.restore(rects.reshape(-1, 4).tolist(), ys.tolist())
+
+        # The HUD and the screen no longer show what the game holds, and the
+        #   cursor is shown or hidden the way it is for that state.
+        ai_game._set_mouse_visible(not game_active)
+        ai_game.sb.prep_images()
+        if getattr(ai_game, 'renderer', None):
+            ai_game.renderer.invalidate()
+
+def _pack_int(value):
+    """Return an integer as 16 little-endian bytes."""
+    return value.to_bytes(16, 'little', signed=True)
+
+def _unpack_int(data):
+    """Return the integer stored by _pack_int()."""
+    return int.from_bytes(data, 'little', signed=True)
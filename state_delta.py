@@ -0,0 +1,197 @@
+"""Send the state of a game of Alien Invasion as compact deltas.
+
+A delta only carries the parts of the state that changed since the last one
+was encoded: the stats, the ship, the fleet's position, the aliens shot down
+and the bullets in flight. The whole fleet is only sent when a new one
+appears. A delta is laid out as:
+
+    varint tick, byte flags, then for each flag that is set, in this order:
+    STATS       varint score, level, ships left, high score; byte game active
+    SHIP        int32 ship x
+    FLEET       varint slots; int32 slot x and slot y arrays; packed alive bits
+    FLEET_MOVE  int32 fleet x shift, int32 fleet y offset
+    KILLS       varint count; varint slot indices
+    BULLETS     varint count; int32 (x, y) pairs
+
+Deltas are sent framed by their length as a little-endian uint32. A length
+of zero is followed by one line of text saying why the server ended the
+session, and nothing more is sent after it.
+"""
+
+import struct
+
+import numpy as np
+
+from replay import read_varint, write_varint
+
+# The parts a delta can carry, as bits of its flags byte.
+STATS = 1
+SHIP = 2
+FLEET = 4
+FLEET_MOVE = 8
+KILLS = 16
+BULLETS = 32
+
+# The length that comes before each delta on the wire.
+LENGTH = struct.Struct('<I')
+
+SHIP_X = struct.Struct('<i')
+FLEET_POSITION = struct.Struct('<ii')
+
+class DeltaEncoder:
+    """A class to encode one game's state against the last state it encoded."""
+
+    def __init__(self):
+        """Initialize the encoder; the first delta carries the whole state."""
+        self.stats = None
+        self.ship_x = None
+        self.slot_x = None
+        self.slot_y = None
+        self.alive = None
+        self.fleet_position = None
+        self.bullets = None
+
+    def encode(self, ai_game, tick):
+        """Return the delta to ai_game's current state, or None if nothing changed."""
+        flags = 0
+        body = bytearray()
+
+        stats = ai_game.stats
+        values = (stats.score, stats.level, stats.ships_left, stats.high_score,
+                  ai_game.game_active)
+        if values != self.stats:
+            flags |= STATS
+            for value in values[:4]:
+                write_varint(body, value)
+            body.append(values[4])
+            self.stats = values
+
+        ship_x = ai_game.ship.rect.x
+        if ship_x != self.ship_x:
+            flags |= SHIP
+            body += SHIP_X.pack(ship_x)
+            self.ship_x = ship_x
+
+        fleet = ai_game.aliens
+        if self._fleet_replaced(fleet):
+            flags |= FLEET
+            write_varint(body, len(fleet.slot_x))
+            body += fleet.slot_x.astype(np.int32).tobytes()
+            body += fleet.slot_y.astype(np.int32).tobytes()
+            body += np.packbits(fleet.alive).tobytes()
+            self.slot_x = fleet.slot_x.copy()
+            self.slot_y = fleet.slot_y.copy()
+            self.alive = fleet.alive.copy()
+            killed = ()
+        else:
+            killed = np.flatnonzero(self.alive > fleet.alive)
+
+        position = (fleet.shift_x, fleet.offset_y)
+        if position != self.fleet_position:
+            flags |= FLEET_MOVE
+            body += FLEET_POSITION.pack(*position)
+            self.fleet_position = position
+
+        if len(killed):
+            flags |= KILLS
+            write_varint(body, len(killed))
+            for index in killed.tolist():
+                write_varint(body, index)
+            self.alive[killed] = False
+
+        bullets = ai_game.bullets.active
+        positions = np.array([(bullet.rect.x, bullet.rect.y) for bullet in bullets],
+                             dtype=np.int32).tobytes()
+        if positions != self.bullets:
+            flags |= BULLETS
+            write_varint(body, len(bullets))
+            body += positions
+            self.bullets = positions
+
+        if not flags:
+            return None
+        delta = bytearray()
+        write_varint(delta, tick)
+        delta.append(flags)
+        return bytes(delta + body)
+
+    def _fleet_replaced(self, fleet):
+        """Return True if the fleet isn't the one last sent, less the aliens shot down."""
+        if self.alive is None or len(self.alive) != len(fleet.alive):
+            return True
+        # Aliens only come back to life in a new fleet.
+        if (fleet.alive > self.alive).any():
+            return True
+        return not (np.array_equal(fleet.slot_x, self.slot_x)
+                    and np.array_equal(fleet.slot_y, self.slot_y))
+
+def error_frame(message):
+    """Return the frame that tells a client why its session was ended."""
+    return LENGTH.pack(0) + message.encode() + b'\n'
+
+class RemoteState:
+    """A class to rebuild a game's state from the deltas sent for it."""
+
+    def __init__(self):
+        """Initialize an empty state, to be filled in by the first delta."""
+        self.tick = 0
+        self.score = self.level = self.ships_left = self.high_score = 0
+        self.game_active = False
+        self.ship_x = 0
+        self.slot_x = np.zeros(0, dtype=np.int32)
+        self.slot_y = np.zeros(0, dtype=np.int32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.shift_x = self.offset_y = 0
+        self.bullets = np.zeros((0, 2), dtype=np.int32)
+
+    @property
+    def rect_x(self):
+        """A new array of every slot's alien x position."""
+        return self.slot_x + self.shift_x
+
+    @property
+    def rect_y(self):
+        """A new array of every slot's alien y position."""
+        return self.slot_y + self.offset_y
+
+    def apply(self, delta):
+        """Bring the state up to date with one delta."""
+        self.tick, position = read_varint(delta, 0)
+        flags = delta[position]
+        position += 1
+
+        if flags & STATS:
+            self.score, position = read_varint(delta, position)
+            self.level, position = read_varint(delta, position)
+            self.ships_left, position = read_varint(delta, position)
+            self.high_score, position = read_varint(delta, position)
+            self.game_active = bool(delta[position])
+            position += 1
+
+        if flags & SHIP:
+            (self.ship_x,) = SHIP_X.unpack_from(delta, position)
+            position += SHIP_X.size
+
+        if flags & FLEET:
+            slots, position = read_varint(delta, position)
+            self.slot_x = np.frombuffer(delta, np.int32, slots, position)
+            position += self.slot_x.nbytes
+            self.slot_y = np.frombuffer(delta, np.int32, slots, position)
+            position += self.slot_y.nbytes
+            packed = np.frombuffer(delta, np.uint8, (slots + 7) // 8, position)
+            position += packed.nbytes
+            self.alive = np.unpackbits(packed, count=slots).astype(bool)
+
+        if flags & FLEET_MOVE:
+            self.shift_x, self.offset_y = FLEET_POSITION.unpack_from(delta, position)
+            position += FLEET_POSITION.size
+
+        if flags & KILLS:
+            count, position = read_varint(delta, position)
+            for _ in range(count):
+                index, position = read_varint(delta, position)
+                self.alive[index] = False
+
+        if flags & BULLETS:
+            count, position = read_varint(delta, position)
+            self.bullets = np.frombuffer(delta, np.int32, 2 * count, position).reshape(count, 2)
@@ -0,0 +1,15 @@
+"""Run the tests against the game's own modules, with no window shown."""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+@pytest.fixture(autouse=True)
+def game_directory(monkeypatch):
+    """Run each test from the game's directory, where its images are found."""
+    monkeypatch.chdir(ROOT)
@@ -0,0 +1,37 @@
+"""The vectorized environment plays every game the same as a single one."""
+
+import numpy as np
+import pytest
+
+from batch import TunedSettings
+from env import AlienInvasionEnv, VectorAlienInvasionEnv
+
+@pytest.mark.parametrize('observation', ['features', 'pixels'])
+def test_vector_env_matches_single_envs(observation):
+    # A quick fleet and thin bullets, so games see hits, lost ships and restarts.
+    overrides = {'fleet_drop_speed': 60, 'bullet_width': 3, 'ship_limit': 1}
+    count = 4
+    vector = VectorAlienInvasionEnv(count, TunedSettings(overrides), observation, max_ticks=None)
+    singles = [AlienInvasionEnv(TunedSettings(overrides), observation, max_ticks=None)
+               for _ in range(count)]
+    observations, _ = vector.reset()
+    for index, env in enumerate(singles):
+        assert np.array_equal(env.reset()[0], observations[index])
+
+    actions = np.random.default_rng(0).choice(6, size=(2000, count), p=[.05, .1, .1, .35, .2, .2])
+    finished = 0
+    for tick_actions in actions:
+        observations, rewards, terminated, _, info = vector.step(tick_actions)
+        for index, env in enumerate(singles):
+            observation_, reward, done, _, single_info = env.step(int(tick_actions[index]))
+            assert reward == rewards[index]
+            assert done == terminated[index]
+            if done:
+                finished += 1
+                assert single_info['score'] == info['final_score'][index]
+                observation_, _ = env.reset()
+            else:
+                assert single_info['score'] == info['score'][index]
+                assert single_info['ships_left'] == info['ships_left'][index]
+            assert np.array_equal(observation_, observations[index])
+    assert finished > 0
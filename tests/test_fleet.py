@@ -0,0 +1,38 @@
+"""Fast-forwarding an idle game ends exactly where stepping through it does."""
+
+import pytest
+
+from batch import TunedSettings
+from game_input import InputState
+from headless import HeadlessGame
+
+def fleet_state(game):
+    """Return everything fast_forward() may change, in comparable form."""
+    fleet = game.aliens
+    return (game.ticks, game.game_active, game.ship.rect.x, fleet.shift_x, fleet.offset_y,
+            game.settings.fleet_direction, fleet.alive.tobytes(), game.stats.ships_left)
+
+@pytest.mark.parametrize('overrides', [
+    {},
+    {'alien_speed': 1.37},
+    {'fleet_drop_speed': 45, 'alien_speed': 2.6},
+])
+def test_fast_forward_matches_stepping(overrides):
+    skipping = HeadlessGame(TunedSettings(overrides))
+    stepping = HeadlessGame(TunedSettings(overrides))
+    for game in (skipping, stepping):
+        game.reset()
+        # Shoot a few aliens down, so the fleet is no longer a full block.
+        game.run(90, lambda game, tick: InputState(left=tick > 40, fire=tick % 15 == 0))
+
+    skipped = 0
+    while skipping.game_active and skipping.ticks < 20_000:
+        ticks = skipping.fast_forward(500)
+        skipped += ticks
+        # An idle tick is also what plays out when fast_forward() can't skip.
+        stepping.run(ticks or 1, stop_on_game_over=False)
+        if not ticks:
+            skipping.run(1, stop_on_game_over=False)
+        assert fleet_state(skipping) == fleet_state(stepping)
+    assert skipped > 1000
+    assert skipping.stats.ships_left < skipping.settings.ship_limit
@@ -0,0 +1,36 @@
+"""The dirty-rectangle renderer draws the same pixels as a full redraw."""
+
+import pygame
+import pytest
+
+from alien_invasion import AlienInvasion
+from batch import TunedSettings
+from game_input import InputState
+
+def redraw_in_full(game):
+    """Return the pixels of a full redraw, leaving the screen as it was."""
+    kept = game.screen.copy()
+    renderer, game.renderer = game.renderer, None
+    game._update_screen()
+    game.renderer = renderer
+    pixels = pygame.image.tobytes(game.screen, 'RGB')
+    game.screen.blit(kept, (0, 0))
+    return pixels
+
+@pytest.mark.parametrize('overrides', [{}, {'bullet_width': 300, 'fleet_drop_speed': 40}])
+def test_dirty_frames_match_full_redraws(overrides, tmp_path):
+    game = AlienInvasion(TunedSettings(dict(
+        overrides, render_mode='dirty', score_db_path=str(tmp_path / 'scores.db'))))
+    try:
+        for tick in range(600):
+            # Sweep across the screen and keep firing once the game has started.
+            sweep = tick // 90 % 2
+            game.step(InputState(left=sweep == 0, right=sweep == 1, fire=tick % 4 == 0,
+                                 start=tick == 30))
+            game._update_screen()
+            assert pygame.image.tobytes(game.screen, 'RGB') == redraw_in_full(game), tick
+        assert game.stats.score > 0
+        assert game.renderer.frames_skipped > 0
+    finally:
+        if game.scores:
+            game.scores.close()
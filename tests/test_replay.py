@@ -0,0 +1,47 @@
+"""Replays saved from a game play back headless to the same result."""
+
+from headless import HeadlessGame, RandomPolicy
+from replay import Replay, ReplayRecorder, verify_replay
+
+def record_game(path, ticks=3000, seed=1, high_score=0):
+    """Play random input for ticks ticks, pressing Play whenever a game isn't on."""
+    game = HeadlessGame()
+    game.stats.high_score = high_score
+    recorder = ReplayRecorder(game, path, seed)
+    policy = RandomPolicy(seed)
+    for tick in range(ticks):
+        controls = policy(game, tick)
+        controls.start = not game.game_active
+        recorder.record(controls)
+        game.step(controls)
+    recorder.save()
+    return game
+
+def test_replay_matches_recorded_game(tmp_path):
+    path = str(tmp_path / 'game.air')
+    game = record_game(path)
+
+    result = verify_replay(path)
+    assert result['match'], result
+    assert result['ticks'] == 3000
+    assert result['actual']['score'] == game.stats.score > 0
+
+def test_replay_survives_save_and_load(tmp_path):
+    path = str(tmp_path / 'game.air')
+    record_game(path, ticks=500)
+    replay = Replay.load(path)
+
+    copy = str(tmp_path / 'copy.air')
+    replay.save(copy)
+    with open(path, 'rb') as original, open(copy, 'rb') as saved:
+        assert original.read() == saved.read()
+    assert replay.ticks == 500
+
+def test_replay_starts_from_the_high_score_to_beat(tmp_path):
+    # A stored best score, from the score store, that the game doesn't reach.
+    path = str(tmp_path / 'game.air')
+    record_game(path, ticks=1500, high_score=10**9)
+
+    result = verify_replay(path)
+    assert result['match'], result
+    assert result['actual']['high_score'] == 10**9
@@ -0,0 +1,35 @@
+"""Restoring a snapshot puts a game back exactly where it was."""
+
+from headless import HeadlessGame, RandomPolicy
+from snapshot import GameSnapshot
+
+def play(game, ticks, seed):
+    """Play random input for ticks ticks, starting a game if none is on."""
+    if not game.game_active:
+        game.reset()
+    game.run(ticks, RandomPolicy(seed), stop_on_game_over=False)
+
+def test_restore_then_same_input_gives_same_game():
+    game = HeadlessGame()
+    play(game, 700, seed=1)
+    snapshot = game.snapshot()
+
+    play(game, 1500, seed=2)
+    ended = game.snapshot()
+
+    game.restore(snapshot)
+    assert game.snapshot() == snapshot
+    play(game, 1500, seed=2)
+    assert game.snapshot() == ended
+
+def test_snapshot_bytes_restore_into_a_new_game():
+    game = HeadlessGame()
+    play(game, 1200, seed=3)
+    snapshot = GameSnapshot(game.snapshot().to_bytes())
+
+    other = HeadlessGame()
+    other.restore(snapshot)
+    assert other.snapshot() == snapshot
+    play(game, 300, seed=4)
+    play(other, 300, seed=4)
+    assert other.snapshot() == game.snapshot()